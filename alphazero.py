@@ -0,0 +1,183 @@
+import math
+import numpy as np
+from mcts import MCTS
+from neural_network import PolicyValueNetwork
+from inference import TorchBackend, auto_backend
+
+# Untrained networks by policy size, shared by the searches that are not given a network
+_default_networks = {}
+
+
+class ActionIndex:
+    """Maps the actions of an environment to fixed units of the policy head.
+
+    A unit stands for the same move in every position: the cell of a board
+    move (Tic-Tac-Toe, or the cell of the moving piece in Breakthrough), the
+    column of a Connect Four drop, or the position of the action in the
+    fixed action set of an environment without a board (Simple).
+    """
+
+    def __init__(self, environment):
+        initial = type(environment)()
+        actions = initial.get_possible_actions()
+        board = getattr(initial, "board", None)
+        self.cols = len(board[0]) if board else 0
+        self.units = None  # Action -> unit for environments without a board
+        if board is None:
+            self.units = {action: i for i, action in enumerate(actions)}
+            self.size = len(actions)
+        elif actions and all(isinstance(action, int) for action in actions):
+            self.size = self.cols  # Column moves
+        else:
+            self.size = len(board) * self.cols  # Cell moves
+        self.size = max(1, self.size)
+
+    def __call__(self, action):
+        if self.units is not None:
+            return self.units[action]
+        if isinstance(action, int):
+            return action
+        row, col = action[1:3] if len(action) > 2 else action
+        return row * self.cols + col
+
+
+class AlphaZeroMCTS(MCTS):
+    def __init__(self, environment, iterations=1000, exploration_weight=1.4, network=None, solver=False,
+                 inference=None):
+        super().__init__(environment, iterations, exploration_weight, solver)
+        self.untrained = network is None  # Built its own network with random weights
+        self.action_index = ActionIndex(environment)  # Policy head unit of each action
+        if network is not None:
+            # Use a given (e.g. trained) network
+            self.network = network
+        else:
+            size = self.action_index.size
+            if size not in _default_networks:
+                input_size = 10  # Default input size
+                _default_networks[size] = PolicyValueNetwork(input_size=input_size, hidden_size=64, output_size=size)
+            self.network = _default_networks[size]
+
+        # Fastest forward pass for the batch size (see inference.py), shared by the searches using this network
+        self.inference = inference if inference is not None else auto_backend(self.network)
+
+    def make_reproducible(self):
+        """Called for seeded searches (see registry.configure_mcts).
+
+        An untrained network is replaced by one initialized from the search's
+        random stream, and the network is evaluated by the reference backend
+        instead of the one AutoBackend found fastest, whose choice depends on
+        timings and whose outputs differ slightly between backends.
+        """
+        if self.untrained:
+            seed = int(self.rng.generator.integers(2 ** 63))
+            self.network = PolicyValueNetwork(input_size=10, hidden_size=64,
+                                              output_size=self.network.policy_head.out_features, seed=seed)
+        self.inference = TorchBackend(self.network)
+
+    def select(self, node):
+        """Descend by PUCT over the priors stored on the children when their parent was evaluated.
+
+        Selection makes no network calls, so in batched rounds and in the
+        search service only leaf evaluations reach the network.
+        """
+        path = [node]
+        while node.children:
+            child = self._puct_child(node)
+            if child is None:
+                break
+            node = child
+            path.append(node)
+        self._path = path
+        return node
+
+    def _puct_child(self, node):
+        """Child maximizing Q + c * P * sqrt(N) / (1 + n); unvisited children count as even (Q = 0.5)."""
+        children = node.children
+        if self.solver:
+            # Solved children need no more simulations
+            children = [c for c in children if c.proven is None]
+        if not children:
+            return None
+        scale = self.exploration_weight * math.sqrt(node.visits)
+        uniform = 1 / len(node.children)  # Prior of children whose parent was never evaluated (e.g. a loaded tree)
+        return max(
+            children,
+            key=lambda c: (c.value / c.visits if c.visits else 0.5)
+            + scale * (uniform if c.prior is None else c.prior) / (1 + c.visits)
+        )
+
+    def simulate(self, node):
+        """Value of a leaf from the value head; the same call gives the priors of its children."""
+        try:
+            policy, value = self.inference(self._prepare_state_array(node.state))
+        except Exception:
+            # Fall back to random simulation if there's an error
+            return self.rng.random()
+        self._set_priors(node, policy[0])
+        return self._value_to_reward(float(value[0]))
+
+    def evaluate_batch(self, nodes):
+        """Evaluate all unsolved leaves of a round, and the priors of their children, with a single network call."""
+        rewards = [self._proven_reward(node) if node.proven is not None else None for node in nodes]
+        pending = [i for i, reward in enumerate(rewards) if reward is None]
+        if pending:
+            states = np.concatenate([self._prepare_state_array(nodes[i].state) for i in pending])
+            policy, values = self.inference(states)
+            for row, i, value in zip(policy, pending, values.tolist()):
+                self._set_priors(nodes[i], row)
+                rewards[i] = self._value_to_reward(value)
+        return rewards
+
+    def _set_priors(self, node, policy):
+        """Store the policy head output of a node on its children, renormalized over them."""
+        if not node.children:
+            return
+        priors = policy[[self.action_index(child.action) for child in node.children]]
+        total = float(priors.sum())
+        for child, prior in zip(node.children, priors.tolist()):
+            child.prior = prior / total if total > 0 else 1 / len(node.children)
+
+    def _value_to_reward(self, value):
+        """Map the value head output (in [-1, 1], for the player to move) to a [0, 1] reward for the player who moved into the node."""
+        if self.two_player:
+            value = -value
+        return (value + 1) / 2
+
+    def _prepare_state_array(self, state):
+        """Prepare state as a (1, 10) float32 input batch for the inference backends."""
+        # Convert state to a flat array
+        state_array = self._flatten_state(state)
+        
+        # Ensure it has the right shape (10 features)
+        if len(state_array) < 10:
+            state_array = np.pad(state_array, (0, 10 - len(state_array)), mode='constant')
+        elif len(state_array) > 10:
+            state_array = state_array[:10]
+        
+        # Add batch dimension
+        return np.asarray(state_array, dtype=np.float32)[None, :]
+
+    def _flatten_state(self, state):
+        """Convert any state representation to a flat array."""
+        if isinstance(state, int):
+            return np.array([float(state)])
+        elif isinstance(state, (list, np.ndarray)):
+            if isinstance(state[0], (list, np.ndarray)):
+                # 2D array (like a board)
+                return np.array([float(x) for row in state for x in row])
+            else:
+                # 1D array
+                return np.array([float(x) for x in state])
+        elif isinstance(state, tuple):
+            # If state is a tuple (e.g., (board, player))
+            if len(state) == 2 and isinstance(state[0], (list, np.ndarray)):
+                board, player = state
+                flattened = [float(x) for row in board for x in row]
+                flattened.append(float(player))
+                return np.array(flattened)
+            else:
+                # Regular tuple
+                return np.array([float(x) for x in state])
+        else:
+            # Fallback for other types
+            return np.array([1.0])  # Ensure at least one element
\ No newline at end of file
@@ -0,0 +1,292 @@
+import argparse
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import time
+import numpy as np
+from mcts import Node
+from registry import PRESETS, weights_path as trained_weights_path, variant_names, is_neural, create_environment, create_mcts, configure_mcts
+
+# Two-player environments that can be played in the arena (Breakthrough starts with no legal moves)
+ARENA_ENVIRONMENTS = ["Tic-Tac-Toe", "Connect Four"]
+
+_networks = {}  # (environment, weights path) -> network, per worker process
+
+
+def parse_agent(spec):
+    """Agent spec "Variant" or "Variant:Preset" -> (variant, use cases)."""
+    variant, _, preset = spec.partition(":")
+    if variant not in variant_names():
+        raise ValueError(f"Unknown MCTS variant: {variant}")
+    if preset and preset not in PRESETS:
+        raise ValueError(f"Unknown preset: {preset}")
+    return variant, set(PRESETS.get(preset, ()))
+
+
+def choose_move(spec, env_name, environment, iterations, move_time, exploration, depth, seed=None):
+    """Search the current position for one agent and return (action, iterations run)."""
+    variant, use_cases = parse_agent(spec)
+    options = {}
+    if is_neural(variant):
+        # Every search is seeded, so it evaluates the network with the reference backend
+        options["network"] = _network(env_name, "ml_policy" in use_cases)
+    mcts = create_mcts(variant, environment, iterations, exploration, depth, env_name=env_name, **options)
+    configure_mcts(mcts, use_cases, depth, env_name, seed)
+    root = Node(environment.state)
+    deadline = time.monotonic() + move_time if move_time is not None else None
+    done = mcts.search_until(root, iterations, deadline)
+    if not root.children:
+        return mcts.rng.choice(environment.get_possible_actions()), done
+    return mcts.best_action(root), done
+
+
+def _network(env_name, trained):
+    """Network shared by the moves of one worker process."""
+    weights_path = trained_weights_path(env_name)
+    weights_path = weights_path if trained and os.path.exists(weights_path) else None
+    key = (env_name, weights_path)
+    if key not in _networks:
+        from self_play import build_network, load_network
+        if weights_path is not None:
+            network = load_network(env_name, weights_path)
+        else:
+            network = build_network(env_name, seed=0)  # Same untrained agent in every worker and run
+            network.eval()
+        _networks[key] = network
+    return _networks[key]
+
+
+def play_game(task):
+    """Play one game between two agents in a worker process and return its result record.
+
+    Every search gets its own seed spawned from the game's seed, so with
+    iteration budgets a game replays identically on any worker.
+    """
+    seeds = np.random.SeedSequence(task["seed"])
+    players = {1: task["first"], -1: task["second"]}
+    environment = create_environment(task["env"])
+    cpu = {task["first"]: 0.0, task["second"]: 0.0}
+    iterations = {task["first"]: 0, task["second"]: 0}
+    moves = 0
+    start = time.monotonic()
+    while not environment.is_terminal() and environment.get_possible_actions() and moves < task["max_moves"]:
+        spec = players[environment.current_player]
+        move_start = time.process_time()
+        action, done = choose_move(spec, task["env"], environment, task["iterations"], task["move_time"],
+                                   task["exploration"], task["depth"], seeds.spawn(1)[0])
+        cpu[spec] += time.process_time() - move_start
+        iterations[spec] += done
+        environment.apply_action(action)
+        moves += 1
+
+    winner = environment.get_winner() if environment.is_terminal() else 0
+    return {
+        "game": task["game"],
+        "first": task["first"],
+        "second": task["second"],
+        "winner": players[winner] if winner else None,
+        "moves": moves,
+        "seconds": time.monotonic() - start,
+        "cpu": cpu,
+        "iterations": iterations,
+    }
+
+
+def make_tasks(env_name, agents, games, iterations, move_time, exploration=1.4, depth=2, max_moves=200, seed=0):
+    """Round-robin tasks: games per pair of agents, alternating which agent moves first.
+
+    Game ids include the settings the game is played with, so a results file
+    only resumes games of the same configuration.
+    """
+    budget = f"{move_time}s" if move_time is not None else f"{iterations}it"
+    config = f"{env_name}|{budget}|c={exploration}|d={depth}|m={max_moves}|s={seed}"
+    tasks = []
+    for a, b in itertools.combinations(agents, 2):
+        for i in range(games):
+            first, second = (a, b) if i % 2 == 0 else (b, a)
+            game = f"{config}|{a}|{b}|{i}"
+            tasks.append({
+                "game": game, "env": env_name, "first": first, "second": second,
+                "iterations": iterations, "move_time": move_time, "exploration": exploration,
+                "depth": depth, "max_moves": max_moves,
+                "seed": [seed, len(tasks)],
+            })
+    return tasks
+
+
+def load_results(path):
+    """Results already streamed to path, keyed by game id (a partial last line is ignored)."""
+    results = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                results[record["game"]] = record
+    return results
+
+
+def _trim_partial_line(path):
+    """Drop an incomplete last line left by an interrupted write, so appended results start on a new line."""
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+
+
+def run_tournament(tasks, path, workers=None, progress=None):
+    """Play the tasks missing from the results file on a process pool, appending each result as it arrives."""
+    results = load_results(path)
+    pending = [task for task in tasks if task["game"] not in results]
+    if not pending:
+        return results
+    if os.path.exists(path):
+        _trim_partial_line(path)
+    finished = len(tasks) - len(pending)
+    with mp.Pool(workers) as pool, open(path, "a") as f:
+        for record in pool.imap_unordered(play_game, pending):
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            results[record["game"]] = record
+            finished += 1
+            if progress is not None:
+                progress(finished, record)
+    return results
+
+
+def wilson_interval(score, n, z=1.96):
+    """Wilson score interval of a win rate (draws count as half a win)."""
+    if n == 0:
+        return 0.0, 1.0
+    center = (score + z * z / (2 * n)) / (1 + z * z / n)
+    margin = z * math.sqrt(score * (1 - score) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def elo_difference(score):
+    """Elo difference implied by an expected score."""
+    score = min(max(score, 1e-3), 1 - 1e-3)
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_ratings(agents, records, iterations=200):
+    """Bradley-Terry ratings on the Elo scale, fitted with minorization-maximization.
+
+    Every pair gets one virtual draw as a prior so that agents that never
+    won or never lost keep finite ratings. The first agent is anchored at 0.
+    """
+    index = {agent: i for i, agent in enumerate(agents)}
+    n = len(agents)
+    games = np.ones((n, n)) - np.eye(n)  # Virtual draw per pair
+    scores = np.full(n, 0.5 * (n - 1))
+    for record in records:
+        i, j = index[record["first"]], index[record["second"]]
+        games[i, j] += 1
+        games[j, i] += 1
+        if record["winner"] is None:
+            scores[i] += 0.5
+            scores[j] += 0.5
+        else:
+            scores[index[record["winner"]]] += 1
+    strength = np.ones(n)
+    for _ in range(iterations):
+        strength = scores / (games / (strength[:, None] + strength[None, :])).sum(axis=1)
+        strength /= strength[0]
+    return {agent: 400 * math.log10(strength[index[agent]]) for agent in agents}
+
+
+def report(agents, results):
+    """Per-agent results, ratings and throughput as text."""
+    records = list(results.values())
+    lines = []
+    ratings = elo_ratings(agents, records) if len(agents) > 1 else {agent: 0.0 for agent in agents}
+    lines.append(f"{'Agent':<32}{'Games':>7}{'W':>6}{'D':>6}{'L':>6}{'Score':>8}{'95% CI':>16}{'Elo':>8}{'CPU ms/move':>13}{'it/s':>10}")
+    for agent in agents:
+        played = [r for r in records if agent in (r["first"], r["second"])]
+        wins = sum(r["winner"] == agent for r in played)
+        draws = sum(r["winner"] is None for r in played)
+        losses = len(played) - wins - draws
+        score = (wins + 0.5 * draws) / len(played) if played else 0.0
+        low, high = wilson_interval(score, len(played))
+        cpu = sum(r["cpu"][agent] for r in played)
+        iterations = sum(r["iterations"][agent] for r in played)
+        # Moves of the agent: the first player makes the extra move of odd-length games
+        moves = sum((r["moves"] + (r["first"] == agent)) // 2 for r in played)
+        cpu_per_move = 1000 * cpu / moves if moves else 0.0
+        rate = iterations / cpu if cpu else 0.0
+        lines.append(
+            f"{agent:<32}{len(played):>7}{wins:>6}{draws:>6}{losses:>6}{score:>8.3f}"
+            f"{f'[{low:.3f}, {high:.3f}]':>16}{ratings[agent]:>8.0f}{cpu_per_move:>13.2f}{rate:>10.0f}"
+        )
+
+    lines.append("")
+    lines.append("Head to head (score of the first agent):")
+    for a, b in itertools.combinations(agents, 2):
+        played = [r for r in records if {r["first"], r["second"]} == {a, b}]
+        if not played:
+            continue
+        score = sum(1.0 if r["winner"] == a else 0.5 if r["winner"] is None else 0.0 for r in played) / len(played)
+        low, high = wilson_interval(score, len(played))
+        lines.append(
+            f"  {a} vs {b}: {score:.3f} [{low:.3f}, {high:.3f}] over {len(played)} games, "
+            f"Elo {elo_difference(score):+.0f} [{elo_difference(low):+.0f}, {elo_difference(high):+.0f}]"
+        )
+
+    if records:
+        seconds = sum(r["seconds"] for r in records)
+        moves = sum(r["moves"] for r in records)
+        lines.append("")
+        lines.append(f"Throughput: {len(records) / seconds:.2f} games/s and {moves / seconds:.1f} moves/s per worker")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play a round-robin tournament between MCTS agents.")
+    parser.add_argument("--env", default="Tic-Tac-Toe", choices=ARENA_ENVIRONMENTS)
+    parser.add_argument("--agents", nargs="+", default=["Basic MCTS", "Basic MCTS:Performance"],
+                        help='Agents as "Variant" or "Variant:Preset", e.g. "Basic MCTS:Deterministic"')
+    parser.add_argument("--games", type=int, default=100, help="Games per pair of agents")
+    parser.add_argument("--iterations", type=int, default=400, help="Iteration budget per move")
+    parser.add_argument("--move-time", type=float, default=None,
+                        help="Time budget per move in seconds, instead of the iteration budget")
+    parser.add_argument("--exploration", type=float, default=1.4)
+    parser.add_argument("--depth", type=int, default=2, help="Nesting level / heuristic rollout depth")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--results", default="arena_results.jsonl",
+                        help="Results file; games already in it are not played again")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if len(set(args.agents)) != len(args.agents):
+        parser.error("Each agent can only be listed once")
+    for spec in args.agents:
+        try:
+            parse_agent(spec)
+        except ValueError as e:
+            parser.error(str(e))
+    iterations = args.iterations if args.move_time is None else 10 ** 9
+    tasks = make_tasks(args.env, args.agents, args.games, iterations, args.move_time,
+                       args.exploration, args.depth, seed=args.seed)
+    start = time.monotonic()
+
+    def progress(count, record):
+        elapsed = time.monotonic() - start
+        print(f"[{elapsed:7.1f}s] {count}/{len(tasks)} games  {record['first']} vs {record['second']}: "
+              f"{record['winner'] or 'draw'}")
+
+    try:
+        results = run_tournament(tasks, args.results, args.workers, progress)
+    except KeyboardInterrupt:
+        print("Stopped; rerun with the same arguments to resume.")
+        results = load_results(args.results)
+    games = {task["game"] for task in tasks}
+    print(report(args.agents, {game: r for game, r in results.items() if game in games}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import argparse
+import os
+import numpy as np
+from random_streams import RandomStream
+from registry import ENVIRONMENTS, environment_slug
+
+TABLE_DIR = "tables"
+UNKNOWN_MOVE = -1
+
+TABLE_DTYPE = np.dtype([
+    ("key", np.uint64),
+    ("value", np.int8),  # 1 win, 0 draw, -1 loss for the player to move
+    ("move", np.int8),  # Code of a best action (see action_code), -1 for terminal positions
+])
+
+# Zobrist keys for boards too large for a perfect index (fixed seed so tables stay valid)
+_ZOBRIST = np.random.default_rng(0x5EED).integers(1, 2 ** 63, size=(64, 2)).tolist()
+_ZOBRIST_SIDE = 0x2545F4914F6CDD1D
+
+
+def table_path(env_name):
+    """Default location of the table of an environment."""
+    return os.path.join(TABLE_DIR, environment_slug(env_name) + ".npy")
+
+
+def position_key(state):
+    """Key of a (board, player) state.
+
+    Boards small enough for 2 * 3 ** cells to fit in 64 bits (Tic-Tac-Toe)
+    get a perfect base-3 index; larger ones (Connect Four) a Zobrist hash.
+    """
+    board, player = state
+    cells = [x for row in board for x in row]
+    if 2 * 3 ** len(cells) < 2 ** 64:
+        index = 0
+        for x in reversed(cells):
+            index = index * 3 + (1 if x == 1 else 2 if x == -1 else 0)
+        return index * 2 + (player == -1)
+    key = _ZOBRIST_SIDE if player == -1 else 0
+    for i, x in enumerate(cells):
+        if x != 0:
+            key ^= _ZOBRIST[i][x == -1]
+    return key
+
+
+def action_code(action, cols):
+    """Encode a (row, col) or column action as a small integer."""
+    if isinstance(action, tuple):
+        return action[0] * cols + action[1]
+    return action
+
+
+class EndgameSolver:
+    """Exhaustive negamax solver storing the exact value and a best move of every position it visits."""
+
+    def __init__(self, environment_cls, prune=True):
+        self.environment_cls = environment_cls
+        self.prune = prune  # Stop at the first winning move instead of visiting every position
+        self.positions = {}  # Key -> (value, move code)
+
+    def solve(self, state):
+        """Return the value of a state for the player to move, solving and recording its subtree."""
+        key = position_key(state)
+        known = self.positions.get(key)
+        if known is not None:
+            return known[0]
+
+        env = self.environment_cls()
+        env.set_state(state)
+        if env.is_terminal():
+            winner = env.get_winner()
+            value = 0 if winner == 0 else (1 if winner == env.current_player else -1)
+            self.positions[key] = (value, UNKNOWN_MOVE)
+            return value
+
+        cols = len(env.board[0])
+        best_value, best_move = -2, UNKNOWN_MOVE
+        for action in env.get_possible_actions():
+            child = self.environment_cls()
+            child.set_state(state)
+            value = -self.solve(child.apply_action(action))
+            if value > best_value:
+                best_value, best_move = value, action_code(action, cols)
+                if best_value == 1 and self.prune:
+                    break  # A win cannot be improved on
+        self.positions[key] = (best_value, best_move)
+        return best_value
+
+    def save(self, path):
+        """Write the solved positions as a key-sorted table."""
+        records = np.empty(len(self.positions), dtype=TABLE_DTYPE)
+        records["key"] = list(self.positions)
+        values = list(self.positions.values())
+        records["value"] = [value for value, _ in values]
+        records["move"] = [move for _, move in values]
+        records.sort(order="key")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, records)
+        os.replace(tmp_path, path)
+
+
+class EndgameTable:
+    """Memory-mapped table of exact position values, looked up by binary search on the sorted keys."""
+
+    def __init__(self, path):
+        self.records = np.load(path, mmap_mode="r")
+        self.keys = self.records["key"]
+
+    def __len__(self):
+        return len(self.records)
+
+    def _find(self, state):
+        key = np.uint64(position_key(state))
+        i = int(np.searchsorted(self.keys, key))
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
+        return None
+
+    def lookup(self, state):
+        """Return the value of a state for the player to move (1, 0, -1), or None if it is not in the table."""
+        i = self._find(state)
+        return None if i is None else int(self.records["value"][i])
+
+    def best_action(self, environment):
+        """Return a best action in the environment's current position, or None if unknown."""
+        i = self._find(environment.state)
+        if i is None or self.records["move"][i] == UNKNOWN_MOVE:
+            return None
+        cols = len(environment.board[0])
+        code = int(self.records["move"][i])
+        for action in environment.get_possible_actions():
+            if action_code(action, cols) == code:
+                return action
+        return None
+
+
+def build_full_table(environment_cls):
+    """Solve every position reachable from the initial state (small games such as Tic-Tac-Toe)."""
+    solver = EndgameSolver(environment_cls, prune=False)
+    solver.solve(environment_cls().state)
+    return solver
+
+
+def build_endgame_table(environment_cls, max_empty=8, games=100, seed=0, max_attempts=None):
+    """Solve games distinct endgames reached by random play once at most max_empty cells are left (Connect Four).
+
+    Most random games end before they get that far, so games keep being
+    played until games new endgames have been solved, or max_attempts
+    (default 1000 * games) games have been played.
+    """
+    rng = RandomStream(seed)
+    solver = EndgameSolver(environment_cls)
+    max_attempts = max_attempts if max_attempts is not None else 1000 * games
+    solved = attempts = 0
+    while solved < games and attempts < max_attempts:
+        attempts += 1
+        env = environment_cls()
+        while not env.is_terminal():
+            empty = sum(row.count(0) for row in env.board)
+            if empty <= max_empty:
+                if position_key(env.state) not in solver.positions:
+                    solver.solve(env.state)
+                    solved += 1
+                break
+            actions = env.get_possible_actions()
+            env.apply_action(rng.choice(actions))
+    return solver
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build perfect-play tables for small board games.")
+    parser.add_argument("--env", default="Tic-Tac-Toe", choices=["Tic-Tac-Toe", "Connect Four"])
+    parser.add_argument("--max-empty", type=int, default=8, help="Connect Four: solve positions with at most this many empty cells")
+    parser.add_argument("--games", type=int, default=100, help="Connect Four: endgames to solve, each reached by random play")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    environment_cls = ENVIRONMENTS[args.env].load()
+    if args.env == "Tic-Tac-Toe":
+        solver = build_full_table(environment_cls)
+    else:
+        solver = build_endgame_table(environment_cls, args.max_empty, args.games)
+    path = args.output or table_path(args.env)
+    solver.save(path)
+    print(f"Wrote {len(solver.positions)} positions to {path}")
+
+
+if __name__ == "__main__":
+    main()
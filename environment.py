@@ -4,6 +4,9 @@ class SimpleEnvironment:
     def __init__(self):
         self.state = 0  # Initial state
 
+    def set_state(self, state):
+        self.state = state
+
     def get_possible_actions(self):
         return ["move_left", "move_right", "stay"]
 
@@ -17,6 +20,14 @@ class SimpleEnvironment:
     def is_terminal(self):
         return self.state >= 10 or self.state <= -10
 
+    def get_winner(self):
+        """Return 1 if the right edge was reached, -1 for the left edge, 0 otherwise."""
+        if self.state >= 10:
+            return 1
+        if self.state <= -10:
+            return -1
+        return 0
+
     def reset(self):
         self.state = 0
         return self.state
@@ -27,6 +38,13 @@ class BreakthroughEnvironment:
         self.current_player = 1  # 1 for White, -1 for Black
         self.state = (self.board, self.current_player)  # Represent state as a tuple
 
+    def set_state(self, state):
+        """Load a (board, player) state, copying the board so it is not shared."""
+        board, player = state
+        self.board = [list(row) for row in board]
+        self.current_player = player
+        self.state = (self.board, self.current_player)
+
     def get_possible_actions(self):
         actions = []
         for x in range(5):
@@ -54,6 +72,14 @@ class BreakthroughEnvironment:
     def is_terminal(self):
         return any(row[0] == 1 for row in self.board) or any(row[-1] == -1 for row in self.board)
 
+    def get_winner(self):
+        """Return the player who reached the opponent's side, or 0."""
+        if any(row[0] == 1 for row in self.board):
+            return 1
+        if any(row[-1] == -1 for row in self.board):
+            return -1
+        return 0
+
     def reset(self):
         self.board = [[0] * 5 for _ in range(5)]
         self.current_player = 1
@@ -66,6 +92,13 @@ class ConnectFourEnvironment:
         self.current_player = 1  # 1 for Player 1, -1 for Player 2
         self.state = (self.board, self.current_player)
 
+    def set_state(self, state):
+        """Load a (board, player) state, copying the board so it is not shared."""
+        board, player = state
+        self.board = [list(row) for row in board]
+        self.current_player = player
+        self.state = (self.board, self.current_player)
+
     def get_possible_actions(self):
         return [col for col in range(7) if self.board[0][col] == 0]
 
@@ -80,24 +113,30 @@ class ConnectFourEnvironment:
 
     def is_terminal(self):
         # Check for a win
+        if self.get_winner() != 0:
+            return True
+        # Check for a draw
+        return all(self.board[0][col] != 0 for col in range(7))
+
+    def get_winner(self):
+        """Return the player with four in a row, or 0."""
         for row in range(6):
             for col in range(4):
                 if self.board[row][col] != 0 and self.board[row][col] == self.board[row][col + 1] == self.board[row][col + 2] == self.board[row][col + 3]:
-                    return True
+                    return self.board[row][col]
         for col in range(7):
             for row in range(3):
                 if self.board[row][col] != 0 and self.board[row][col] == self.board[row + 1][col] == self.board[row + 2][col] == self.board[row + 3][col]:
-                    return True
+                    return self.board[row][col]
         for row in range(3):
             for col in range(4):
                 if self.board[row][col] != 0 and self.board[row][col] == self.board[row + 1][col + 1] == self.board[row + 2][col + 2] == self.board[row + 3][col + 3]:
-                    return True
+                    return self.board[row][col]
         for row in range(3):
             for col in range(3, 7):
                 if self.board[row][col] != 0 and self.board[row][col] == self.board[row + 1][col - 1] == self.board[row + 2][col - 2] == self.board[row + 3][col - 3]:
-                    return True
-        # Check for a draw
-        return all(self.board[0][col] != 0 for col in range(7))
+                    return self.board[row][col]
+        return 0
 
     def reset(self):
         self.board = [[0] * 7 for _ in range(6)]
@@ -111,6 +150,13 @@ class TicTacToeEnvironment:
         self.current_player = 1  # 1 for Player 1, -1 for Player 2
         self.state = (self.board, self.current_player)
 
+    def set_state(self, state):
+        """Load a (board, player) state, copying the board so it is not shared."""
+        board, player = state
+        self.board = [list(row) for row in board]
+        self.current_player = player
+        self.state = (self.board, self.current_player)
+
     def get_possible_actions(self):
         return [(row, col) for row in range(3) for col in range(3) if self.board[row][col] == 0]
 
@@ -122,24 +168,31 @@ class TicTacToeEnvironment:
         return self.state
 
     def is_terminal(self):
+        # Check for a win
+        if self.get_winner() != 0:
+            return True
+        # Check for a draw
+        return all(self.board[row][col] != 0 for row in range(3) for col in range(3))
+
+    def get_winner(self):
+        """Return the player with three in a row, or 0."""
         # Check rows
         for row in range(3):
             if self.board[row][0] != 0 and self.board[row][0] == self.board[row][1] == self.board[row][2]:
-                return True
+                return self.board[row][0]
         # Check columns
         for col in range(3):
             if self.board[0][col] != 0 and self.board[0][col] == self.board[1][col] == self.board[2][col]:
-                return True
+                return self.board[0][col]
         # Check diagonals
         if self.board[0][0] != 0 and self.board[0][0] == self.board[1][1] == self.board[2][2]:
-            return True
+            return self.board[0][0]
         if self.board[0][2] != 0 and self.board[0][2] == self.board[1][1] == self.board[2][0]:
-            return True
-        # Check for a draw
-        return all(self.board[row][col] != 0 for row in range(3) for col in range(3))
+            return self.board[0][2]
+        return 0
 
     def reset(self):
         self.board = [[0] * 3 for _ in range(3)]
         self.current_player = 1
         self.state = (self.board, self.current_player)
-        return self.state
\ No newline at end of file
+        return self.state
@@ -0,0 +1,46 @@
+import argparse
+import time
+from registry import environment_names, variant_names, create_environment, create_mcts, configure_mcts
+
+
+def run_search(env_name, variant_name, iterations=1000, exploration_weight=1.4, depth=2,
+               solver=False, heuristic=False, weights_path=None, seed=None):
+    """Search the initial position of an environment without the GUI and return (root, mcts)."""
+    environment = create_environment(env_name)
+    mcts = create_mcts(variant_name, environment, iterations, exploration_weight, depth,
+                       env_name=env_name, weights_path=weights_path)
+    use_cases = set()
+    if solver:
+        use_cases.add("solver")
+    if heuristic:
+        use_cases.add("heuristic")
+    configure_mcts(mcts, use_cases, depth, env_name, seed)
+    return mcts.search(environment.state), mcts
+
+
+def main():
+    start = time.perf_counter()
+    parser = argparse.ArgumentParser(description="Run an MCTS search without the GUI.")
+    parser.add_argument("--env", default="Simple", choices=environment_names())
+    parser.add_argument("--variant", default="Basic MCTS", choices=variant_names())
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--exploration", type=float, default=1.4)
+    parser.add_argument("--depth", type=int, default=2, help="Nesting level / heuristic rollout depth")
+    parser.add_argument("--solver", action="store_true")
+    parser.add_argument("--heuristic", action="store_true")
+    parser.add_argument("--weights", default=None, help="Trained weights for neural variants")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for a reproducible search")
+    args = parser.parse_args()
+
+    search_start = time.perf_counter()
+    root, mcts = run_search(args.env, args.variant, args.iterations, args.exploration, args.depth,
+                         args.solver, args.heuristic, args.weights, args.seed)
+    end = time.perf_counter()
+
+    print(f"Best action: {mcts.best_action(root)}")
+    print(f"Root visits: {root.visits}  children: {len(root.children)}")
+    print(f"Startup {search_start - start:.3f}s  search {end - search_start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import math
+import numpy as np
+from environment import SimpleEnvironment, BreakthroughEnvironment, ConnectFourEnvironment, TicTacToeEnvironment
+
+
+def line_windows(rows, cols, length):
+    """Flat cell indices of every horizontal, vertical and diagonal window of the given length."""
+    r = np.arange(rows)[:, None]
+    c = np.arange(cols)[None, :]
+    steps = np.arange(length)
+    windows = []
+    for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        # Start cells whose window stays on the board
+        end_r = r + dr * (length - 1)
+        end_c = c + dc * (length - 1)
+        valid = (end_r < rows) & (end_c >= 0) & (end_c < cols)
+        start_r, start_c = np.broadcast_to(r, valid.shape)[valid], np.broadcast_to(c, valid.shape)[valid]
+        cells_r = start_r[:, None] + dr * steps
+        cells_c = start_c[:, None] + dc * steps
+        windows.append(cells_r * cols + cells_c)
+    return np.concatenate(windows)
+
+
+CONNECT_FOUR_WINDOWS = line_windows(6, 7, 4)  # 69 windows of 4 cells
+TIC_TAC_TOE_WINDOWS = line_windows(3, 3, 3)  # 8 lines of 3 cells
+
+# Weight of an open window (no opposing piece) by the number of own pieces in it
+CONNECT_FOUR_WEIGHTS = np.array([0.0, 0.01, 0.05, 0.25, 1.0])
+TIC_TAC_TOE_WEIGHTS = np.array([0.0, 0.05, 0.3, 1.0])
+
+
+def window_score(board, player, windows, weights):
+    """Score open windows for player minus open windows for the opponent, squashed to [-1, 1]."""
+    cells = np.asarray(board, dtype=np.int8).ravel()[windows]
+    own = (cells == player).sum(axis=1)
+    other = (cells == -player).sum(axis=1)
+    score = weights[own][other == 0].sum() - weights[other][own == 0].sum()
+    return math.tanh(score)
+
+
+def connect_four_heuristic(state):
+    """Open two/three/four windows for the player to move."""
+    board, player = state
+    return window_score(board, player, CONNECT_FOUR_WINDOWS, CONNECT_FOUR_WEIGHTS)
+
+
+def tic_tac_toe_heuristic(state):
+    """Open one/two/three-in-a-row lines for the player to move."""
+    board, player = state
+    return window_score(board, player, TIC_TAC_TOE_WINDOWS, TIC_TAC_TOE_WEIGHTS)
+
+
+def breakthrough_heuristic(state):
+    """Piece advancement and safety (a friendly piece diagonally behind) for the player to move."""
+    board, player = state
+    board = np.asarray(board, dtype=np.int8)
+    rows = board.shape[0]
+    white = board == 1  # Moves towards higher rows
+    black = board == -1  # Moves towards lower rows
+    progress = np.arange(rows)[:, None] / (rows - 1)
+    advancement = (white * progress).sum() - (black * (1 - progress)).sum()
+
+    # Supporters sit one row behind, one column to either side
+    white_supported = np.zeros_like(white)
+    white_supported[1:, 1:] |= white[:-1, :-1]
+    white_supported[1:, :-1] |= white[:-1, 1:]
+    black_supported = np.zeros_like(black)
+    black_supported[:-1, 1:] |= black[1:, :-1]
+    black_supported[:-1, :-1] |= black[1:, 1:]
+    safety = (white & white_supported).sum() - (black & black_supported).sum()
+
+    return math.tanh(0.5 * (advancement + 0.5 * safety)) * player
+
+
+def simple_heuristic(state):
+    """Distance travelled towards the right edge."""
+    return max(-1.0, min(1.0, state / 10))
+
+
+HEURISTICS = {
+    SimpleEnvironment: simple_heuristic,
+    BreakthroughEnvironment: breakthrough_heuristic,
+    ConnectFourEnvironment: connect_four_heuristic,
+    TicTacToeEnvironment: tic_tac_toe_heuristic,
+}
+
+
+def heuristic_for(environment):
+    """Heuristic of an environment: state -> value in [-1, 1] for the player to move."""
+    return HEURISTICS[type(environment)]
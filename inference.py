@@ -0,0 +1,220 @@
+import functools
+import time
+import numpy as np
+import torch
+import torch.nn as nn
+
+
+class TorchBackend:
+    """Reference backend: the eager PyTorch module under inference mode."""
+    name = "torch"
+
+    def __init__(self, network):
+        self.network = network
+
+    def refresh(self):
+        """Pick up new weights of the network (nothing to do for the eager module)."""
+
+    def __call__(self, states):
+        with torch.inference_mode():
+            policy, value = self.network(torch.from_numpy(np.asarray(states, dtype=np.float32)))
+        return policy.numpy(), value.numpy()[:, 0]
+
+
+class NumpyBackend:
+    """Pure-NumPy forward pass over weights exported from the module.
+
+    For batch size 1 this avoids the per-op dispatch overhead of PyTorch,
+    which dominates the cost of such a small MLP.
+    """
+    name = "numpy"
+
+    def __init__(self, network):
+        self.network = network
+        self.refresh()
+
+    def refresh(self):
+        """Re-export the weights, e.g. after load_state_dict."""
+        def export(layer):
+            return (
+                layer.weight.detach().cpu().numpy().T.astype(np.float32),
+                layer.bias.detach().cpu().numpy().astype(np.float32),
+            )
+
+        self.fc1 = export(self.network.fc1)
+        self.fc2 = export(self.network.fc2)
+        self.policy_head = export(self.network.policy_head)
+        self.value_head = export(self.network.value_head)
+
+    def __call__(self, states):
+        x = np.asarray(states, dtype=np.float32)
+        x = np.maximum(x @ self.fc1[0] + self.fc1[1], 0)
+        x = np.maximum(x @ self.fc2[0] + self.fc2[1], 0)
+        logits = x @ self.policy_head[0] + self.policy_head[1]
+        logits -= logits.max(axis=1, keepdims=True)
+        policy = np.exp(logits)
+        policy /= policy.sum(axis=1, keepdims=True)
+        value = np.tanh(x @ self.value_head[0] + self.value_head[1])
+        return policy, value[:, 0]
+
+
+class TracedBackend(TorchBackend):
+    """TorchScript-traced module run under inference mode."""
+    name = "traced"
+
+    def __init__(self, network):
+        super().__init__(network)
+        self.refresh()
+
+    def refresh(self):
+        example = torch.zeros(1, self.network.fc1.in_features)
+        with torch.inference_mode():
+            self.traced = torch.jit.trace(self.network, example, check_trace=False)
+
+    def __call__(self, states):
+        with torch.inference_mode():
+            policy, value = self.traced(torch.from_numpy(np.asarray(states, dtype=np.float32)))
+        return policy.numpy(), value.numpy()[:, 0]
+
+
+class QuantizedBackend(TorchBackend):
+    """Module with its Linear layers dynamically quantized to int8."""
+    name = "int8"
+
+    def __init__(self, network):
+        super().__init__(network)
+        self.refresh()
+
+    def refresh(self):
+        self.quantized = torch.ao.quantization.quantize_dynamic(self.network, {nn.Linear}, dtype=torch.qint8)
+
+    def __call__(self, states):
+        with torch.inference_mode():
+            policy, value = self.quantized(torch.from_numpy(np.asarray(states, dtype=np.float32)))
+        return policy.numpy(), value.numpy()[:, 0]
+
+
+BACKENDS = [TorchBackend, NumpyBackend, TracedBackend, QuantizedBackend]
+
+# Largest acceptable deviation from the reference module
+PARITY_TOLERANCE = {"torch": 0.0, "numpy": 1e-5, "traced": 1e-6, "int8": 0.05}
+
+# Batch size buckets AutoBackend benchmarks when it is created: single-leaf
+# selection, batched rounds and the shared batches of the search service
+CALIBRATED_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def available_backends(network, classes=BACKENDS):
+    """Instantiate every backend of the given classes supported on this platform."""
+    backends = []
+    for backend_cls in classes:
+        try:
+            backends.append(backend_cls(network))
+        except (RuntimeError, AssertionError):
+            pass  # E.g. no quantized engine for this CPU
+    return backends
+
+
+def check_parity(network, backends=None, batch_size=32, seed=0):
+    """Compare each backend with the reference module on random inputs.
+
+    Returns a dict backend name -> (max policy error, max value error, within tolerance);
+    a backend that raises on the inputs gets infinite errors.
+    """
+    backends = backends if backends is not None else available_backends(network)
+    states = np.random.default_rng(seed).standard_normal((batch_size, network.fc1.in_features)).astype(np.float32)
+    reference_policy, reference_value = TorchBackend(network)(states)
+    results = {}
+    for backend in backends:
+        try:
+            policy, value = backend(states)
+        except (RuntimeError, ValueError):
+            results[backend.name] = (float("inf"), float("inf"), False)
+            continue
+        policy_error = float(np.abs(policy - reference_policy).max())
+        value_error = float(np.abs(value - reference_value).max())
+        tolerance = PARITY_TOLERANCE.get(backend.name, 1e-5)
+        results[backend.name] = (policy_error, value_error, max(policy_error, value_error) <= tolerance)
+    return results
+
+
+def benchmark(network, backends=None, batch_sizes=(1, 8, 64, 256), repeats=200, seed=0):
+    """Median latency in microseconds per call, as a dict backend name -> {batch size: latency}."""
+    backends = backends if backends is not None else available_backends(network)
+    rng = np.random.default_rng(seed)
+    results = {}
+    for backend in backends:
+        results[backend.name] = {}
+        for batch_size in batch_sizes:
+            states = rng.standard_normal((batch_size, network.fc1.in_features)).astype(np.float32)
+            backend(states)  # Warm up
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                backend(states)
+                timings.append(time.perf_counter() - start)
+            results[backend.name][batch_size] = float(np.median(timings)) * 1e6
+    return results
+
+
+class AutoBackend:
+    """Dispatches each call to the backend that was fastest for its batch size.
+
+    Batch sizes are bucketed by powers of two. The buckets are benchmarked
+    once, on creation, among the backends that passed the parity check;
+    larger batches use the backend of the largest bucket, so no call ever
+    waits on a benchmark. The int8 backend trades accuracy for speed and is
+    only considered with quantized=True.
+    """
+    name = "auto"
+
+    def __init__(self, network, repeats=20, buckets=CALIBRATED_BUCKETS, quantized=False):
+        self.network = network
+        self.repeats = repeats
+        backends = available_backends(network, [cls for cls in BACKENDS if quantized or cls.name != "int8"])
+        parity = check_parity(network, backends)
+        self.backends = [b for b in backends if parity[b.name][2]]
+        latencies = benchmark(network, self.backends, batch_sizes=buckets, repeats=repeats)
+        # Batch size bucket -> backend
+        self.choice = {
+            bucket: min(self.backends, key=lambda b: latencies[b.name][bucket]) for bucket in buckets
+        }
+        self.largest = max(buckets)
+
+    def refresh(self):
+        """Re-export the weights to every backend, e.g. after load_state_dict."""
+        for backend in self.backends:
+            backend.refresh()
+
+    def backend_for(self, batch_size):
+        bucket = 1 << max(0, batch_size - 1).bit_length()
+        return self.choice.get(bucket) or self.choice[self.largest]
+
+    def __call__(self, states):
+        return self.backend_for(len(states))(states)
+
+
+@functools.lru_cache(maxsize=8)
+def auto_backend(network):
+    """The AutoBackend of a network, calibrated on first use and shared by every search using that network."""
+    return AutoBackend(network)
+
+
+def main():
+    from neural_network import PolicyValueNetwork
+
+    network = PolicyValueNetwork(input_size=10, hidden_size=64, output_size=9)
+    network.eval()
+    print("Parity against the reference module (max policy error, max value error, ok):")
+    for name, result in check_parity(network).items():
+        print(f"  {name:<8}{result[0]:.2e}  {result[1]:.2e}  {'ok' if result[2] else 'FAILED'}")
+    results = benchmark(network)
+    batch_sizes = sorted(next(iter(results.values())))
+    print("Median latency per call (us):")
+    print("  " + " " * 8 + "".join(f"{f'batch {b}':>12}" for b in batch_sizes))
+    for name, latencies in results.items():
+        print(f"  {name:<8}" + "".join(f"{latencies[b]:12.1f}" for b in batch_sizes))
+
+
+if __name__ == "__main__":
+    main()
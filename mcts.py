@@ -1,8 +1,14 @@
 import math
-import random
-import torch
+import time
 import numpy as np
-from neural_network import PolicyValueNetwork
+from heuristics import heuristic_for
+from random_streams import RandomStream
+
+# Game-theoretic values proven by the solver, from the point of view of the player to move
+WIN = 1
+DRAW = 0
+LOSS = -1
+
 
 class Node:
     def __init__(self, state, parent=None, action=None):
@@ -12,70 +18,321 @@ class Node:
         self.visits = 0
         self.value = 0
         self.action = action  # Store the action that led to this node
+        self.proven = None  # WIN, DRAW or LOSS once solved, None while undecided
+        self.prior = None  # Policy prior of the action leading here, set by AlphaZero MCTS
 
     def expand(self, environment):
-        """Expand node by creating child nodes for all possible actions."""
-        possible_actions = environment.get_possible_actions()
+        """Expand node by creating child nodes for all possible actions; expanded nodes are left as they are."""
+        if self.children:
+            return
+        env = type(environment)()
+        env.set_state(self.state)
+        if env.is_terminal():
+            return
+        possible_actions = env.get_possible_actions()
         for action in possible_actions:
             # Create a copy of the environment to avoid modifying the original
             env_copy = type(environment)()
-            env_copy.state = environment.state
+            env_copy.set_state(self.state)
             # Apply the action to get the new state
             new_state = env_copy.apply_action(action)
             # Create a child node with the new state and action
             child = Node(new_state, parent=self, action=action)
             self.children.append(child)
 
-    def best_child(self, exploration_weight=1.4):
+    def best_child(self, exploration_weight=1.4, skip_proven=False):
         """Select the child with the highest UCB score."""
-        if not self.children:
+        children = self.children
+        if skip_proven:
+            # Solved children need no more simulations
+            children = [c for c in children if c.proven is None]
+        if not children:
             return None
         
         return max(
-            self.children,
+            children,
             key=lambda c: (c.value / (c.visits + 1e-6)) + exploration_weight * math.sqrt(math.log(self.visits + 1) / (c.visits + 1e-6))
         )
 
 
 class MCTS:
-    def __init__(self, environment, iterations=1000, exploration_weight=1.4):
+    def __init__(self, environment, iterations=1000, exploration_weight=1.4, solver=False):
         self.environment = environment
         self.iterations = iterations
         self.exploration_weight = exploration_weight
+        self.solver = solver  # Prove wins/losses (MCTS-Solver) in two-player games
+        self.endgame_table = None  # EndgameTable giving exact values of known positions (see endgame.py)
+        self.rollout_depth = None  # Moves per heuristic-cutoff rollout, None for a random reward
+        self.heuristic = None  # State -> value for the player to move, defaults to heuristics.heuristic_for
+        self.stats = None  # SearchStats when profiling is enabled (see profiling.py)
+        # Rewards flip perspective at every level in games with alternating players
+        self.two_player = hasattr(environment, "current_player")
+        self.batch_size = 1  # Leaves selected (under virtual loss) and evaluated together per round
+        self._path = None  # Nodes visited by the last selection, root first
+        self.rng = RandomStream()  # Own random stream; replace with a seeded one for reproducible searches
 
-    def search(self, root_state):
-        root = Node(root_state)
-        for _ in range(self.iterations):
-            node = self.select(root)
-            node.expand(self.environment)
-            reward = self.simulate(node)
-            self.backpropagate(node, reward)
+    def search(self, root_state, root=None):
+        """Run the search from root_state, or continue it from an existing (e.g. restored) root."""
+        if root is None:
+            root = Node(root_state)
+        self.search_until(root, self.iterations)
         return root
 
+    def search_until(self, root, iterations, deadline=None):
+        """Run up to iterations iterations from root, stopping early once the root is solved or
+        time.monotonic() passes the deadline. Returns the number of iterations run."""
+        done = 0
+        while done < iterations:
+            if root.proven is not None:
+                break  # Root solved, nothing left to search
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if self.batch_size > 1:
+                done += self.search_batch(root, min(self.batch_size, iterations - done))
+            else:
+                node = self.select(root)
+                self.expand(node)
+                reward = self.evaluate(node)
+                self.backpropagate(node, reward)
+                done += 1
+        return done
+
+    def search_batch(self, root, count):
+        """Run one round of up to count iterations whose leaves are evaluated and backpropagated together.
+
+        Each selected path gets a virtual loss (a visit without reward) so that
+        the following selections of the round spread over different leaves.
+        Returns the number of iterations run.
+        """
+        leaves, paths = [], []
+        for _ in range(count):
+            if root.proven is not None:
+                break
+            leaf = self.select(root)
+            path = self._path
+            self.expand(leaf)
+            if self.solver:
+                # Settle proofs now, so that later selections of the round do not stop at a node
+                # whose children were all solved by this expansion
+                self._propagate_proof(leaf)
+            for node in path:
+                node.visits += 1
+            leaves.append(leaf)
+            paths.append(path)
+        for path in paths:
+            for node in path:
+                node.visits -= 1
+        if leaves:
+            self.backpropagate_batch(leaves, self.evaluate_batch(leaves), paths)
+        return len(leaves)
+
+    def best_action(self, root):
+        """Action to play after searching root, or None if it has no children.
+
+        The best move of the endgame table is played when it knows the root;
+        a table hit solves the root during its first expansion, so the visit
+        counts say nothing about the moves. Otherwise a child proven lost for
+        the opponent is a winning move and is played at once, and children
+        proven won for the opponent are avoided while any other move remains.
+        Ties between the rest go to the most visited child.
+        """
+        if self.endgame_table is not None:
+            env = type(self.environment)()
+            env.set_state(root.state)
+            action = self.endgame_table.best_action(env)
+            if action is not None:
+                return action
+        if not root.children:
+            return None
+        winning = [child for child in root.children if child.proven == LOSS]
+        candidates = winning or [child for child in root.children if child.proven != WIN] or root.children
+        return max(candidates, key=lambda child: child.visits).action
+
     def select(self, node):
         """Select a leaf node by traversing the tree using UCB policy."""
+        path = [node]
         while node.children:
-            best_child = node.best_child(self.exploration_weight)
+            best_child = node.best_child(self.exploration_weight, skip_proven=self.solver)
             if best_child is None:
                 break
             node = best_child
+            path.append(node)
+        self._path = path
         return node
 
+    def expand(self, node):
+        """Expand the selected node in the search environment."""
+        node.expand(self.environment)
+        if self.endgame_table is not None:
+            self._lookup_endgame(node)
+            for child in node.children:
+                self._lookup_endgame(child)
+        if self.solver:
+            self._solve_terminal(node)
+            for child in node.children:
+                self._solve_terminal(child)
+
+    def evaluate(self, node):
+        """Reward of a leaf: exact for solved nodes, simulated otherwise."""
+        if node.proven is not None:
+            return self._proven_reward(node)
+        return self.simulate(node)
+
+    def evaluate_batch(self, nodes):
+        """Rewards of several leaves; variants with a batched evaluator override this."""
+        return [self.evaluate(node) for node in nodes]
+
     def simulate(self, node):
         """Simulate a random playout from the given node."""
-        return random.uniform(0, 1)
+        if self.rollout_depth is None:
+            return self.rng.random()
+        return self._cutoff_rollout(node)
+
+    def _cutoff_rollout(self, node):
+        """Play random moves for at most rollout_depth plies, then score the position heuristically.
+
+        The reward is for the player who moved into the node, on the [0, 1] scale.
+        """
+        if self.heuristic is None:
+            self.heuristic = heuristic_for(self.environment)
+        env = type(self.environment)()
+        env.set_state(node.state)
+        # Player who moved into the node; single-player environments only have player 1
+        mover = -env.current_player if hasattr(env, "current_player") else 1
+        steps = 0
+        while steps < self.rollout_depth and not env.is_terminal():
+            actions = env.get_possible_actions()
+            if not actions:
+                break
+            env.apply_action(self.rng.choice(actions))
+            steps += 1
+        if self.stats is not None:
+            self.stats.record_rollout(steps)
+
+        # Value for the player to move at the end of the rollout
+        player = getattr(env, "current_player", 1)
+        if env.is_terminal():
+            winner = env.get_winner()
+            value = 0 if winner == 0 else (1 if winner == player else -1)
+        else:
+            value = self.heuristic(env.state)
+        if player != mover:
+            value = -value
+        return (value + 1) / 2
 
     def backpropagate(self, node, reward):
-        """Update node statistics going up the tree."""
-        while node:
-            node.visits += 1
-            node.value += reward
+        """Update node statistics along the selected path, leaf first.
+
+        The reward is for the player who moved into the leaf; in two-player
+        games it flips to 1 - reward at every level above (negamax).
+        """
+        if self.solver:
+            self._propagate_proof(node)
+        path = self._path if self._path and self._path[-1] is node else self._path_to(node)
+        self._path = None
+        for ancestor in reversed(path):
+            ancestor.visits += 1
+            ancestor.value += reward
+            if self.two_player:
+                reward = 1 - reward
+
+    def backpropagate_batch(self, leaves, rewards, paths=None):
+        """Backpropagate many leaves at once.
+
+        The paths are flattened into one index array over the distinct nodes
+        they touch, the negamax-signed rewards are summed per node with
+        np.add.at, and each node is then updated once, so shared ancestors
+        such as the root cost one update per batch instead of one per leaf.
+        """
+        if paths is None:
+            paths = [self._path_to(leaf) for leaf in leaves]
+        if self.solver:
+            for leaf in leaves:
+                self._propagate_proof(leaf)
+
+        slots = {}  # id(node) -> index into the statistics arrays
+        nodes = []
+        indices = []
+        for path in paths:
+            for node in path:
+                slot = slots.get(id(node))
+                if slot is None:
+                    slot = slots[id(node)] = len(nodes)
+                    nodes.append(node)
+                indices.append(slot)
+        indices = np.array(indices, dtype=np.intp)
+
+        lengths = np.array([len(path) for path in paths])
+        starts = np.cumsum(lengths) - lengths
+        # Distance of every path entry from its leaf
+        distance = np.repeat(starts + lengths - 1, lengths) - np.arange(len(indices))
+        signed = np.repeat(np.asarray(rewards, dtype=np.float64), lengths)
+        if self.two_player:
+            signed = np.where(distance % 2 == 1, 1 - signed, signed)
+
+        visits = np.zeros(len(nodes), dtype=np.int64)
+        values = np.zeros(len(nodes), dtype=np.float64)
+        np.add.at(visits, indices, 1)
+        np.add.at(values, indices, signed)
+        for node, node_visits, node_value in zip(nodes, visits.tolist(), values.tolist()):
+            node.visits += node_visits
+            node.value += node_value
+
+    def _path_to(self, node):
+        """Nodes from the root down to node, for callers that did not select it."""
+        path = []
+        while node is not None:
+            path.append(node)
             node = node.parent
+        return path[::-1]
+
+    def _solve_terminal(self, node):
+        """Give a terminal node its exact value for the player to move."""
+        if node.proven is not None:
+            return
+        env = type(self.environment)()
+        env.set_state(node.state)
+        if not env.is_terminal():
+            return
+        player = getattr(env, "current_player", 1)
+        winner = env.get_winner()
+        node.proven = DRAW if winner == 0 else (WIN if winner == player else LOSS)
+
+    def _lookup_endgame(self, node):
+        """Mark a node found in the endgame table as solved with its exact value."""
+        if node.proven is None:
+            value = self.endgame_table.lookup(node.state)
+            if value is not None:
+                node.proven = value  # Table values use the same WIN/DRAW/LOSS convention
+
+    def _propagate_proof(self, node):
+        """Propagate proven values towards the root until a node stays undecided.
+
+        A node is a win if any child is a loss for the opponent, a loss if
+        every child is a win for the opponent, and a draw if every child is
+        solved and none of them is a loss.
+        """
+        node = node.parent if node.proven is not None else node
+        while node is not None and node.proven is None and node.children:
+            outcomes = [child.proven for child in node.children]
+            if LOSS in outcomes:
+                node.proven = WIN
+            elif None in outcomes:
+                break
+            elif all(outcome == WIN for outcome in outcomes):
+                node.proven = LOSS
+            else:
+                node.proven = DRAW
+            node = node.parent
+
+    def _proven_reward(self, node):
+        """Reward of a solved node for the player who moved into it, on the [0, 1] simulation scale."""
+        return {WIN: 0.0, DRAW: 0.5, LOSS: 1.0}[node.proven]
 
 
 class NestedMCTS(MCTS):
-    def __init__(self, environment, iterations=1000, nesting_level=2, exploration_weight=1.4):
-        super().__init__(environment, iterations, exploration_weight)
+    def __init__(self, environment, iterations=1000, nesting_level=2, exploration_weight=1.4, solver=False):
+        super().__init__(environment, iterations, exploration_weight, solver)
         self.nesting_level = nesting_level
 
     def simulate(self, node, level=None):
@@ -83,7 +340,7 @@ class NestedMCTS(MCTS):
         if level is None:
             level = self.nesting_level
         if level == 0:
-            return random.uniform(0, 1)
+            return MCTS.simulate(self, node)
         else:
             best_reward = -float('inf')
             for _ in range(10):  # Number of nested simulations
@@ -94,8 +351,8 @@ class NestedMCTS(MCTS):
 
 
 class NRPA(MCTS):
-    def __init__(self, environment, iterations=1000, exploration_weight=1.4):
-        super().__init__(environment, iterations, exploration_weight)
+    def __init__(self, environment, iterations=1000, exploration_weight=1.4, solver=False):
+        super().__init__(environment, iterations, exploration_weight, solver)
         self.policy = {}
 
     def simulate(self, node):
@@ -109,10 +366,10 @@ class NRPA(MCTS):
             self.policy[state_hash] = np.ones(len(possible_actions))
         
         # Use policy to select action
-        action_probs = self.policy[state_hash] / np.sum(self.policy[state_hash])
-        if len(possible_actions) > 0 and len(action_probs) > 0:
+        cumulative = np.cumsum(self.policy[state_hash])
+        if len(possible_actions) > 0 and len(cumulative) > 0:
             try:
-                action_idx = np.random.choice(len(possible_actions), p=action_probs)
+                action_idx = self.rng.sample_cumulative(cumulative)
                 action = possible_actions[action_idx]
                 
                 # Apply action to get new state
@@ -122,7 +379,7 @@ class NRPA(MCTS):
             except (ValueError, IndexError):
                 pass  # Fall back to random reward if there's an issue
         
-        return random.uniform(0, 1)
+        return MCTS.simulate(self, node)
     
     def _hash_state(self, state):
         """Convert state to a hashable form."""
@@ -146,103 +403,9 @@ class NRPA(MCTS):
             return state
 
 
-class AlphaZeroMCTS(MCTS):
-    def __init__(self, environment, iterations=1000, exploration_weight=1.4):
-        super().__init__(environment, iterations, exploration_weight)
-        # Get the number of possible actions
-        possible_actions = environment.get_possible_actions()
-        action_size = len(possible_actions)
-        
-        # Ensure input_size is valid (at least 1)
-        input_size = 10  # Default input size
-        self.network = PolicyValueNetwork(input_size=input_size, hidden_size=64, output_size=action_size)
-
-    def select(self, node):
-        """Select a node using the policy network."""
-        current = node
-        while current.children:
-            try:
-                # Process state for the neural network
-                state_tensor = self._prepare_state_tensor(current.state)
-                
-                # Get policy prediction from the network
-                policy, _ = self.network(state_tensor)
-                policy = policy.squeeze().detach().numpy()
-                
-                # Select child with highest policy value
-                if len(policy) > 0 and current.children:
-                    # Simple selection of child with highest policy score
-                    best_child = current.children[0]
-                    best_score = float('-inf')
-                    
-                    for i, child in enumerate(current.children):
-                        # Ensure index is in bounds
-                        idx = min(i, len(policy) - 1)
-                        score = policy[idx]
-                        if score > best_score:
-                            best_score = score
-                            best_child = child
-                    
-                    current = best_child
-                else:
-                    break
-            except Exception as e:
-                # Fallback to UCB selection in case of error
-                best_child = current.best_child(self.exploration_weight)
-                if best_child is None:
-                    break
-                current = best_child
-        
-        return current
-
-    def simulate(self, node):
-        """Simulate using the value network."""
-        try:
-            # Process state for the neural network
-            state_tensor = self._prepare_state_tensor(node.state)
-            
-            # Get value prediction from the network
-            _, value = self.network(state_tensor)
-            return value.item()
-        except:
-            # Fall back to random simulation if there's an error
-            return random.uniform(0, 1)
-
-    def _prepare_state_tensor(self, state):
-        """Prepare state as input tensor for the neural network."""
-        # Convert state to a flat array
-        state_array = self._flatten_state(state)
-        
-        # Ensure it has the right shape (10 features)
-        if len(state_array) < 10:
-            state_array = np.pad(state_array, (0, 10 - len(state_array)), mode='constant')
-        elif len(state_array) > 10:
-            state_array = state_array[:10]
-        
-        # Convert to tensor and add batch dimension
-        return torch.FloatTensor(state_array).unsqueeze(0)
-
-    def _flatten_state(self, state):
-        """Convert any state representation to a flat array."""
-        if isinstance(state, int):
-            return np.array([float(state)])
-        elif isinstance(state, (list, np.ndarray)):
-            if isinstance(state[0], (list, np.ndarray)):
-                # 2D array (like a board)
-                return np.array([float(x) for row in state for x in row])
-            else:
-                # 1D array
-                return np.array([float(x) for x in state])
-        elif isinstance(state, tuple):
-            # If state is a tuple (e.g., (board, player))
-            if len(state) == 2 and isinstance(state[0], (list, np.ndarray)):
-                board, player = state
-                flattened = [float(x) for row in board for x in row]
-                flattened.append(float(player))
-                return np.array(flattened)
-            else:
-                # Regular tuple
-                return np.array([float(x) for x in state])
-        else:
-            # Fallback for other types
-            return np.array([1.0])  # Ensure at least one element
\ No newline at end of file
+def __getattr__(name):
+    # AlphaZeroMCTS lives in alphazero.py so that torch is only imported when it is used
+    if name == "AlphaZeroMCTS":
+        from alphazero import AlphaZeroMCTS
+        return AlphaZeroMCTS
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
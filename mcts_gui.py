@@ -1,11 +1,15 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 import time
 import threading
 import queue
-from mcts import MCTS, NestedMCTS, NRPA, AlphaZeroMCTS, Node
-from environment import SimpleEnvironment, BreakthroughEnvironment, ConnectFourEnvironment, TicTacToeEnvironment
+from mcts import Node, WIN, DRAW, LOSS
+from registry import environment_names, variant_names, create_environment, create_mcts, configure_mcts, PRESETS, weights_path as trained_weights_path, DETERMINISTIC_SEED
 from visualization import Visualization
+from tree_utils import tree_stats
+from tree_io import save_tree, TreeSnapshot
+from profiling import enable_profiling
+
 
 class MCTSApp:
     def __init__(self):
@@ -67,6 +71,9 @@ class MCTSApp:
         self.paused = False
         self.running = False
         self.simulation_thread = None
+        self.last_root = None  # Tree of the latest run, for saving
+        self.last_env_name = None  # Environment the latest tree was searched in
+        self.resume_root = None  # Loaded tree the next run continues from
         self.message_queue = queue.Queue()
         self.root.after(100, self.check_queue)
         
@@ -74,6 +81,10 @@ class MCTSApp:
         self.progress = ttk.Progressbar(self.output_frame, orient="horizontal", length=1000, mode="determinate")
         self.progress.pack(pady=10, fill=tk.X, padx=10)
         
+        # Live search statistics, filled when profiling is enabled
+        self.stats_label = ttk.Label(self.output_frame, text="", font=("Courier", 9), justify=tk.LEFT)
+        self.stats_label.pack(fill=tk.X, padx=10, pady=(0, 10))
+        
         # Add zoom controls for visualization
         self.create_zoom_controls()
 
@@ -88,7 +99,7 @@ class MCTSApp:
         self.env_menu = ttk.Combobox(
             settings_grid,
             textvariable=self.env_var,
-            values=["Simple", "Breakthrough", "Connect Four", "Tic-Tac-Toe"],
+            values=environment_names(),
             width=15,
             state="readonly",
         )
@@ -100,7 +111,7 @@ class MCTSApp:
         self.mcts_menu = ttk.Combobox(
             settings_grid,
             textvariable=self.mcts_var,
-            values=["Basic MCTS", "Nested MCTS", "NRPA", "AlphaZero MCTS"],
+            values=variant_names(),
             width=15,
             state="readonly",
         )
@@ -151,6 +162,20 @@ class MCTSApp:
             state=tk.DISABLED
         )
         self.stop_button.pack(side=tk.LEFT, padx=5)
+        
+        self.save_button = ttk.Button(
+            self.control_frame,
+            text="💾 Save Tree",
+            command=self.save_tree
+        )
+        self.save_button.pack(side=tk.LEFT, padx=5)
+        
+        self.load_button = ttk.Button(
+            self.control_frame,
+            text="📂 Load Tree",
+            command=self.load_tree
+        )
+        self.load_button.pack(side=tk.LEFT, padx=5)
 
     def create_usecase_widgets(self):
         # Set up use cases with checkboxes in a grid
@@ -166,7 +191,7 @@ class MCTSApp:
             "progressive": {"var": tk.BooleanVar(value=False), "text": "Progressive Widening", 
                           "tooltip": "Gradually add actions to the tree"},
             "heuristic": {"var": tk.BooleanVar(value=False), "text": "Heuristic Evaluation", 
-                        "tooltip": "Use domain knowledge to guide simulations"},
+                        "tooltip": "Cut rollouts off after Sim Depth moves and score them with a heuristic"},
             "virtual_loss": {"var": tk.BooleanVar(value=False), "text": "Virtual Loss", 
                            "tooltip": "Discourage thread collisions in parallel search"},
             "rave": {"var": tk.BooleanVar(value=False), "text": "RAVE", 
@@ -175,6 +200,12 @@ class MCTSApp:
                             "tooltip": "Cache and reuse subtrees for equivalent states"},
             "ml_policy": {"var": tk.BooleanVar(value=False), "text": "ML Policy Guidance", 
                         "tooltip": "Use trained policy network to guide search"},
+            "solver": {"var": tk.BooleanVar(value=False), "text": "MCTS-Solver", 
+                     "tooltip": "Prove wins/losses and stop searching decided subtrees (two-player games)"},
+            "endgame": {"var": tk.BooleanVar(value=False), "text": "Endgame Tables", 
+                      "tooltip": "Use precomputed perfect-play tables (endgame.py) for exact leaf values"},
+            "profiling": {"var": tk.BooleanVar(value=False), "text": "Search Profiling", 
+                        "tooltip": "Measure time per phase, tree growth and network calls"},
         }
         
         # Create checkboxes in a 2x4 grid
@@ -199,7 +230,7 @@ class MCTSApp:
         ttk.Label(preset_frame, text="Optimization Presets:").pack(side=tk.LEFT, padx=5)
         
         self.preset_var = tk.StringVar(value="None")
-        presets = ["None", "Performance", "Memory Efficient", "ML Enhanced", "Deterministic"]
+        presets = ["None"] + list(PRESETS)
         self.preset_menu = ttk.Combobox(
             preset_frame,
             textvariable=self.preset_var,
@@ -243,8 +274,8 @@ class MCTSApp:
         self.canvas = tk.Canvas(canvas_frame, bg="white")
         
         # Add scrollbars
-        h_scrollbar = ttk.Scrollbar(canvas_frame, orient=tk.HORIZONTAL, command=self.canvas.xview)
-        v_scrollbar = ttk.Scrollbar(canvas_frame, orient=tk.VERTICAL, command=self.canvas.yview)
+        h_scrollbar = ttk.Scrollbar(canvas_frame, orient=tk.HORIZONTAL, command=self.scroll_x)
+        v_scrollbar = ttk.Scrollbar(canvas_frame, orient=tk.VERTICAL, command=self.scroll_y)
         
         # Configure canvas scroll region
         self.canvas.configure(xscrollcommand=h_scrollbar.set, yscrollcommand=v_scrollbar.set)
@@ -262,6 +293,8 @@ class MCTSApp:
         self.canvas.bind("<MouseWheel>", self.zoom_canvas)  # Windows
         self.canvas.bind("<Button-4>", self.zoom_canvas)    # Linux scroll up
         self.canvas.bind("<Button-5>", self.zoom_canvas)    # Linux scroll down
+        self.canvas.bind("<Configure>", lambda event: self.schedule_refresh())
+        self.refresh_pending = False
 
     def create_zoom_controls(self):
         """Create zoom controls for the visualization"""
@@ -272,6 +305,26 @@ class MCTSApp:
         ttk.Button(zoom_frame, text="➖ Zoom Out", command=lambda: self.zoom_canvas(None, zoom_in=False)).pack(side=tk.LEFT, padx=5)
         ttk.Button(zoom_frame, text="🔄 Reset View", command=self.reset_zoom).pack(side=tk.LEFT, padx=5)
         
+        # Level of detail: collapse children below a visit count or outside the top-k
+        ttk.Label(zoom_frame, text="Min Visits:").pack(side=tk.LEFT, padx=(15, 2))
+        self.min_visits_var = tk.StringVar(value="1")
+        min_visits_spin = ttk.Spinbox(
+            zoom_frame, from_=0, to=100000, textvariable=self.min_visits_var,
+            width=6, command=self.apply_detail_settings
+        )
+        min_visits_spin.pack(side=tk.LEFT, padx=2)
+        min_visits_spin.bind("<Return>", self.apply_detail_settings)
+        
+        ttk.Label(zoom_frame, text="Top-K:").pack(side=tk.LEFT, padx=(10, 2))
+        self.top_k_var = tk.StringVar(value="5")
+        top_k_spin = ttk.Spinbox(
+            zoom_frame, from_=0, to=1000, textvariable=self.top_k_var,
+            width=6, command=self.apply_detail_settings
+        )
+        top_k_spin.pack(side=tk.LEFT, padx=2)
+        top_k_spin.bind("<Return>", self.apply_detail_settings)
+        self.apply_detail_settings()
+        
         # Color legend
         legend_frame = ttk.Frame(zoom_frame)
         legend_frame.pack(side=tk.RIGHT, padx=10)
@@ -313,30 +366,53 @@ class MCTSApp:
         zoom_factor = 1.1 if zoom_in else 0.9
         self.visualization.zoom *= zoom_factor
         self.canvas.scale("all", 0, 0, zoom_factor, zoom_factor)
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        self.schedule_refresh()
 
     def reset_zoom(self):
         """Reset the canvas zoom to default"""
-        self.visualization.zoom = 1.0
         self.canvas.scale("all", 0, 0, 1 / self.visualization.zoom, 1 / self.visualization.zoom)
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        self.visualization.zoom = 1.0
+        self.schedule_refresh()
+
+    def scroll_x(self, *args):
+        """Scroll the canvas horizontally and redraw the newly visible nodes"""
+        self.canvas.xview(*args)
+        self.schedule_refresh()
+
+    def scroll_y(self, *args):
+        """Scroll the canvas vertically and redraw the newly visible nodes"""
+        self.canvas.yview(*args)
+        self.schedule_refresh()
+
+    def schedule_refresh(self):
+        """Redraw the tree once after a burst of scroll/zoom events"""
+        if self.refresh_pending:
+            return
+        self.refresh_pending = True
+
+        def refresh():
+            self.refresh_pending = False
+            self.visualization.refresh()
+
+        self.root.after(50, refresh)
+
+    def apply_detail_settings(self, event=None):
+        """Apply the level-of-detail settings to the visualization"""
+        try:
+            min_visits = int(self.min_visits_var.get())
+            top_k = int(self.top_k_var.get())
+        except ValueError:
+            return
+        self.visualization.min_visits = max(0, min_visits)
+        self.visualization.top_k = top_k if top_k > 0 else None  # 0 shows every child
+        self.schedule_refresh()
 
     def apply_preset(self, event=None):
         """Apply a preset configuration for use cases"""
         preset = self.preset_var.get()
-        if preset == "Performance":
-            self.use_cases["parallel"]["var"].set(True)
-            self.use_cases["virtual_loss"]["var"].set(True)
-            self.use_cases["rave"]["var"].set(True)
-        elif preset == "Memory Efficient":
-            self.use_cases["pruning"]["var"].set(True)
-            self.use_cases["transposition"]["var"].set(True)
-        elif preset == "ML Enhanced":
-            self.use_cases["ml_policy"]["var"].set(True)
-            self.use_cases["heuristic"]["var"].set(True)
-        elif preset == "Deterministic":
-            self.use_cases["progressive"]["var"].set(True)
-            self.use_cases["heuristic"]["var"].set(True)
+        if preset in PRESETS:
+            for case in PRESETS[preset]:
+                self.use_cases[case]["var"].set(True)
         else:
             for case in self.use_cases.values():
                 case["var"].set(False)
@@ -359,32 +435,39 @@ class MCTSApp:
             messagebox.showerror("Error", "Please enter valid simulation parameters.")
             return
 
-        # Initialize environment
-        if env_name == "Simple":
-            environment = SimpleEnvironment()
-        elif env_name == "Breakthrough":
-            environment = BreakthroughEnvironment()
-        elif env_name == "Connect Four":
-            environment = ConnectFourEnvironment()
-        elif env_name == "Tic-Tac-Toe":
-            environment = TicTacToeEnvironment()
-        else:
-            messagebox.showerror("Error", f"Invalid environment selected: {env_name}")
+        # A loaded tree can only be searched further in the environment it was built in
+        if self.resume_root is not None and self.last_env_name != env_name:
+            searched_in = self.last_env_name or "an unrecorded environment"
+            messagebox.showerror("Error", f"The loaded tree was searched in {searched_in}; "
+                                          f"select that environment or load another tree.")
             return
 
-        # Initialize MCTS variant
-        if mcts_variant == "Basic MCTS":
-            mcts = MCTS(environment, iterations, exploration_weight=exploration)
-        elif mcts_variant == "Nested MCTS":
-            mcts = NestedMCTS(environment, iterations, nesting_level=sim_depth, exploration_weight=exploration)
-        elif mcts_variant == "NRPA":
-            mcts = NRPA(environment, iterations, exploration_weight=exploration)
-        elif mcts_variant == "AlphaZero MCTS":
-            mcts = AlphaZeroMCTS(environment, iterations, exploration_weight=exploration)
-        else:
-            messagebox.showerror("Error", "Invalid MCTS variant selected.")
+        # Initialize environment and MCTS variant; torch is only imported for neural variants
+        try:
+            environment = create_environment(env_name)
+            # Use the weights trained by self_play.py when ML policy guidance is enabled
+            weights_path = trained_weights_path(env_name) if self.use_cases["ml_policy"]["var"].get() else None
+            mcts = create_mcts(mcts_variant, environment, iterations, exploration_weight=exploration,
+                               depth=sim_depth, env_name=env_name, weights_path=weights_path)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
             return
 
+        # Solver, heuristic rollouts, batched rounds and endgame tables
+        enabled = {name for name, case in self.use_cases.items() if case["var"].get()}
+        # The Deterministic preset seeds the search so that runs repeat exactly
+        seed = DETERMINISTIC_SEED if self.preset_var.get() == "Deterministic" else None
+        for note in configure_mcts(mcts, enabled, sim_depth, env_name, seed):
+            self.output_text.insert(tk.END, note + "\n")
+
+        # Instrument the search if requested
+        if self.use_cases["profiling"]["var"].get():
+            enable_profiling(mcts)
+        self.stats_label.config(text="")
+
+        # Drop the items of the previous tree
+        self.visualization.clear()
+
         # Enable/disable controls
         self.run_button.config(state=tk.DISABLED)
         self.pause_button.config(state=tk.NORMAL)
@@ -392,6 +475,7 @@ class MCTSApp:
 
         # Start simulation in a separate thread
         self.running = True
+        self.last_env_name = env_name
         self.simulation_thread = threading.Thread(
             target=self.run_simulation,
             args=(mcts, environment, iterations)
@@ -400,39 +484,60 @@ class MCTSApp:
 
     def run_simulation(self, mcts, environment, iterations):
         """Run the MCTS simulation"""
-        root = Node(environment.state)
-        for i in range(iterations):
+        # Continue from a loaded tree if there is one
+        root = self.resume_root if self.resume_root is not None else Node(environment.state)
+        self.resume_root = None
+        self.last_root = root
+        done = 0
+        stats_posted = 0  # Iterations when the statistics were last sent
+        while done < iterations:
             if not self.running:
                 break
 
             while self.paused:
                 time.sleep(0.1)
 
-            # Step 1: Selection
-            node = mcts.select(root)
-            self.message_queue.put(("update_explanation", "Step 1: Selection - Traversing the tree to select a node"))
-            self.message_queue.put(("update_tree", root))
+            if root.proven is not None:
+                self.message_queue.put(("update_explanation", "Root solved - stopping the search early"))
+                break
 
-            # Step 2: Expansion
-            node.expand(environment)
-            self.message_queue.put(("update_explanation", "Step 2: Expansion - Expanding the selected node"))
-            self.message_queue.put(("update_tree", root))
+            if mcts.batch_size > 1:
+                # One round: several selections, one batched evaluation and backpropagation
+                done += mcts.search_batch(root, min(mcts.batch_size, iterations - done))
+                self.message_queue.put(("update_explanation", "Batched round - Selecting, evaluating and backpropagating several leaves together"))
+                self.message_queue.put(("update_tree", root))
+            else:
+                # Step 1: Selection
+                node = mcts.select(root)
+                self.message_queue.put(("update_explanation", "Step 1: Selection - Traversing the tree to select a node"))
+                self.message_queue.put(("update_tree", root))
 
-            # Step 3: Simulation
-            reward = mcts.simulate(node)
-            self.message_queue.put(("update_explanation", "Step 3: Simulation - Simulating a random playout"))
-            self.message_queue.put(("update_tree", root))
+                # Step 2: Expansion
+                mcts.expand(node)
+                self.message_queue.put(("update_explanation", "Step 2: Expansion - Expanding the selected node"))
+                self.message_queue.put(("update_tree", root))
 
-            # Step 4: Backpropagation
-            mcts.backpropagate(node, reward)
-            self.message_queue.put(("update_explanation", "Step 4: Backpropagation - Updating node statistics"))
-            self.message_queue.put(("update_tree", root))
+                # Step 3: Simulation
+                reward = mcts.evaluate(node)
+                self.message_queue.put(("update_explanation", "Step 3: Simulation - Simulating a random playout"))
+                self.message_queue.put(("update_tree", root))
 
-            # Update progress bar
-            self.message_queue.put(("update_progress", i + 1))
+                # Step 4: Backpropagation
+                mcts.backpropagate(node, reward)
+                self.message_queue.put(("update_explanation", "Step 4: Backpropagation - Updating node statistics"))
+                self.message_queue.put(("update_tree", root))
+                done += 1
+
+            # Update progress bar, and the statistics every 50 iterations
+            self.message_queue.put(("update_progress", done))
+            if mcts.stats is not None and done - stats_posted >= 50:
+                self.message_queue.put(("update_stats", mcts.stats.summary()))
+                stats_posted = done
 
         # Simulation finished
-        self.message_queue.put(("simulation_finished", None))
+        if mcts.stats is not None:
+            self.message_queue.put(("update_stats", mcts.stats.summary()))
+        self.message_queue.put(("simulation_finished", root))
 
     def toggle_pause(self):
         """Toggle pause/resume for the simulation"""
@@ -442,6 +547,43 @@ class MCTSApp:
         else:
             self.pause_button.config(text="⏸ Pause")
 
+    def save_tree(self):
+        """Save the tree of the latest run to a binary snapshot"""
+        if self.last_root is None:
+            messagebox.showerror("Error", "There is no tree to save yet.")
+            return
+        if self.running:
+            messagebox.showerror("Error", "Stop or finish the simulation before saving the tree.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".mcts", filetypes=[("MCTS tree", "*.mcts")])
+        if not path:
+            return
+        save_tree(self.last_root, path, self.last_env_name)
+        self.output_text.insert(tk.END, f"Tree saved to {path}\n")
+        self.output_text.see(tk.END)
+
+    def load_tree(self):
+        """Load a saved tree; the next run continues searching from it"""
+        if self.running:
+            return
+        path = filedialog.askopenfilename(filetypes=[("MCTS tree", "*.mcts"), ("All files", "*")])
+        if not path:
+            return
+        try:
+            snapshot = TreeSnapshot(path)
+            root = snapshot.to_nodes()
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Could not load tree: {e}")
+            return
+        self.resume_root = root
+        self.last_root = root
+        self.last_env_name = snapshot.env_name
+        self.visualization.clear()
+        self.visualization.update(root)
+        self.output_text.insert(tk.END, f"Tree loaded from {path} ({snapshot.env_name or 'unknown environment'}, {root.visits} visits); "
+                                        f"the next run continues from it.\n")
+        self.output_text.see(tk.END)
+
     def stop_simulation(self):
         """Stop the simulation"""
         self.running = False
@@ -452,6 +594,8 @@ class MCTSApp:
 
     def check_queue(self):
         """Check the message queue for updates"""
+        # Only the latest tree snapshot needs to be drawn
+        pending_tree = None
         try:
             while True:
                 message_type, data = self.message_queue.get_nowait()
@@ -459,15 +603,28 @@ class MCTSApp:
                     self.output_text.insert(tk.END, data + "\n")
                     self.output_text.see(tk.END)
                 elif message_type == "update_tree":
-                    self.visualization.update(data)
+                    pending_tree = data
                 elif message_type == "update_progress":
                     self.progress["value"] = data
+                elif message_type == "update_stats":
+                    self.stats_label.config(text=data)
                 elif message_type == "simulation_finished":
                     self.stop_simulation()
                     self.output_text.insert(tk.END, "Simulation finished.\n")
+                    if data.proven is not None:
+                        outcome = {WIN: "win", DRAW: "draw", LOSS: "loss"}[data.proven]
+                        self.output_text.insert(tk.END, f"Root solved: {outcome} for the player to move.\n")
+                    stats = tree_stats(data)
+                    self.output_text.insert(
+                        tk.END,
+                        f"Tree: {stats['nodes']} nodes, {stats['leaves']} leaves, "
+                        f"max depth {stats['max_depth']}, avg branching {stats['avg_branching']:.2f}\n"
+                    )
                     self.output_text.see(tk.END)
         except queue.Empty:
             pass
+        if pending_tree is not None:
+            self.visualization.update(pending_tree)
         self.root.after(100, self.check_queue)
 
     def run(self):
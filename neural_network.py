@@ -2,12 +2,16 @@ import torch
 import torch.nn as nn
 
 class PolicyValueNetwork(nn.Module):
-    def __init__(self, input_size, hidden_size, output_size):
+    def __init__(self, input_size, hidden_size, output_size, seed=None):
         super(PolicyValueNetwork, self).__init__()
-        self.fc1 = nn.Linear(input_size, hidden_size)
-        self.fc2 = nn.Linear(hidden_size, hidden_size)
-        self.policy_head = nn.Linear(hidden_size, output_size)
-        self.value_head = nn.Linear(hidden_size, 1)
+        # A seed gives reproducible initial weights without touching the global torch generator
+        with torch.random.fork_rng(devices=[], enabled=seed is not None):
+            if seed is not None:
+                torch.manual_seed(seed)
+            self.fc1 = nn.Linear(input_size, hidden_size)
+            self.fc2 = nn.Linear(hidden_size, hidden_size)
+            self.policy_head = nn.Linear(hidden_size, output_size)
+            self.value_head = nn.Linear(hidden_size, 1)
 
     def forward(self, x):
         x = torch.relu(self.fc1(x))
@@ -0,0 +1,195 @@
+import cProfile
+import json
+import pstats
+from time import perf_counter_ns
+
+PHASES = ("select", "expand", "simulate", "backpropagate")
+
+
+class SearchStats:
+    """Counters and per-phase timings collected while profiling a search."""
+
+    def __init__(self, trace=False):
+        self.time_ns = dict.fromkeys(PHASES, 0)  # Cumulative time per phase
+        self.calls = dict.fromkeys(PHASES, 0)  # Number of calls per phase
+        self.nodes_allocated = 0
+        self.expansions = 0  # Expand calls that created at least one child
+        self.max_depth = 0
+        self.rollouts = 0
+        self.rollout_steps = 0
+        self.nn_calls = 0
+        self.nn_samples = 0  # Sum of the batch sizes of all network calls
+        self.trace = [] if trace else None  # (phase, start_ns, duration_ns) events
+
+    def record(self, phase, start, end):
+        self.time_ns[phase] += end - start
+        self.calls[phase] += 1
+        if self.trace is not None:
+            self.trace.append((phase, start, end - start))
+
+    def record_rollout(self, length):
+        """Called by simulate implementations that play out moves."""
+        self.rollouts += 1
+        self.rollout_steps += length
+
+    def record_nn_call(self, batch_size):
+        self.nn_calls += 1
+        self.nn_samples += batch_size
+
+    @property
+    def avg_branching(self):
+        return self.nodes_allocated / self.expansions if self.expansions else 0.0
+
+    @property
+    def avg_rollout_length(self):
+        return self.rollout_steps / self.rollouts if self.rollouts else 0.0
+
+    @property
+    def avg_batch_size(self):
+        return self.nn_samples / self.nn_calls if self.nn_calls else 0.0
+
+    def as_dict(self):
+        return {
+            "time_ms": {phase: ns / 1e6 for phase, ns in self.time_ns.items()},
+            "calls": dict(self.calls),
+            "nodes_allocated": self.nodes_allocated,
+            "max_depth": self.max_depth,
+            "avg_branching": self.avg_branching,
+            "avg_rollout_length": self.avg_rollout_length,
+            "nn_calls": self.nn_calls,
+            "avg_batch_size": self.avg_batch_size,
+        }
+
+    def summary(self):
+        """Human-readable multi-line summary of the collected statistics."""
+        total = sum(self.time_ns.values()) or 1
+        lines = []
+        for phase in PHASES:
+            calls = self.calls[phase]
+            per_call = self.time_ns[phase] / calls / 1e3 if calls else 0.0
+            lines.append(
+                f"{phase:<14}{self.time_ns[phase] / 1e6:9.1f} ms  {100 * self.time_ns[phase] / total:5.1f}%  "
+                f"{calls:8d} calls  {per_call:8.1f} us/call"
+            )
+        lines.append(
+            f"nodes {self.nodes_allocated}  max depth {self.max_depth}  "
+            f"branching {self.avg_branching:.2f}  rollout length {self.avg_rollout_length:.1f}  "
+            f"NN calls {self.nn_calls} (avg batch {self.avg_batch_size:.1f})"
+        )
+        return "\n".join(lines)
+
+    def dump_trace(self, path):
+        """Write the recorded phase events in Chrome trace format (chrome://tracing, Perfetto)."""
+        if self.trace is None:
+            raise ValueError("Tracing was not enabled for these statistics")
+        events = [
+            {"name": phase, "ph": "X", "ts": start / 1e3, "dur": duration / 1e3, "pid": 0, "tid": 0}
+            for phase, start, duration in self.trace
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events}, f)
+
+
+def _timed(stats, phase, method, active=None):
+    """Wrap a phase method; nested calls (e.g. NestedMCTS.simulate) are timed once.
+
+    Wrappers that share the active flag count as one phase, so a call made
+    from inside another one is not timed twice.
+    """
+    if active is None:
+        active = [False]
+
+    def wrapper(*args, **kwargs):
+        if active[0]:
+            return method(*args, **kwargs)
+        active[0] = True
+        start = perf_counter_ns()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            stats.record(phase, start, perf_counter_ns())
+            active[0] = False
+
+    return wrapper
+
+
+class _CountingNetwork:
+    """Proxy around a network that records the number and batch size of its calls."""
+
+    def __init__(self, network, stats):
+        self.network = network
+        self.stats = stats
+
+    def __call__(self, x):
+        self.stats.record_nn_call(x.shape[0])
+        return self.network(x)
+
+    def __getattr__(self, name):
+        return getattr(self.network, name)
+
+
+def enable_profiling(mcts, trace=False):
+    """Instrument an MCTS instance and return its SearchStats.
+
+    The phase methods are wrapped on the instance only, so a search that is
+    not profiled runs the plain methods with no overhead at all.
+    """
+    if mcts.stats is not None:
+        disable_profiling(mcts)
+    stats = SearchStats(trace)
+    select = _timed(stats, "select", mcts.select)
+    expand = _timed(stats, "expand", mcts.expand)
+
+    def select_with_depth(node):
+        leaf = select(node)
+        depth = len(mcts._path) - 1  # select records the path it took, root first
+        if depth > stats.max_depth:
+            stats.max_depth = depth
+        return leaf
+
+    def expand_with_count(node):
+        before = len(node.children)
+        expand(node)
+        created = len(node.children) - before
+        if created:
+            stats.nodes_allocated += created
+            stats.expansions += 1
+
+    mcts.select = select_with_depth
+    mcts.expand = expand_with_count
+    # Leaf evaluation counts as the simulate phase: evaluate also scores solved
+    # leaves without simulating, and batched rounds go through evaluate_batch,
+    # which AlphaZeroMCTS implements without calling simulate
+    simulating = [False]
+    mcts.simulate = _timed(stats, "simulate", mcts.simulate, simulating)
+    mcts.evaluate = _timed(stats, "simulate", mcts.evaluate, simulating)
+    mcts.evaluate_batch = _timed(stats, "simulate", mcts.evaluate_batch, simulating)
+    backpropagating = [False]
+    mcts.backpropagate = _timed(stats, "backpropagate", mcts.backpropagate, backpropagating)
+    mcts.backpropagate_batch = _timed(stats, "backpropagate", mcts.backpropagate_batch, backpropagating)
+    if hasattr(mcts, "inference"):
+        mcts.inference = _CountingNetwork(mcts.inference, stats)
+    mcts.stats = stats
+    return stats
+
+
+def disable_profiling(mcts):
+    """Remove the instrumentation added by enable_profiling and return the collected stats."""
+    stats = mcts.stats
+    for phase in PHASES + ("evaluate", "evaluate_batch", "backpropagate_batch"):
+        mcts.__dict__.pop(phase, None)
+    if isinstance(getattr(mcts, "inference", None), _CountingNetwork):
+        mcts.inference = mcts.inference.network
+    mcts.stats = None
+    return stats
+
+
+def profile_search(mcts, root_state, path=None, sort="cumulative"):
+    """Run mcts.search under cProfile, dump the raw profile to path if given, and return (root, report)."""
+    profiler = cProfile.Profile()
+    root = profiler.runcall(mcts.search, root_state)
+    if path is not None:
+        profiler.dump_stats(path)
+    report = pstats.Stats(profiler)
+    report.sort_stats(sort)
+    return root, report
@@ -0,0 +1,42 @@
+import numpy as np
+
+
+class RandomStream:
+    """Independent random number stream for one search or worker.
+
+    Numbers come from its own numpy Generator, drawn in blocks of block_size
+    and handed out one at a time through a list iterator, so the per-call
+    cost in rollout loops stays close to that of the global random module.
+    Streams are seeded from a SeedSequence; spawn() derives statistically
+    independent child streams, so a seeded run is reproducible however its
+    searches are distributed over workers.
+    """
+
+    def __init__(self, seed=None, block_size=4096):
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.generator = np.random.default_rng(self.seed_sequence)
+        self.block_size = block_size
+        self._numbers = iter(())
+
+    def spawn(self, count=1):
+        """Return a list of count independent child streams."""
+        return [RandomStream(child, self.block_size) for child in self.seed_sequence.spawn(count)]
+
+    def random(self):
+        """Uniform float in [0, 1)."""
+        try:
+            return next(self._numbers)
+        except StopIteration:
+            self._numbers = iter(self.generator.random(self.block_size).tolist())
+            return next(self._numbers)
+
+    def choice(self, sequence):
+        return sequence[int(self.random() * len(sequence))]
+
+    def sample_cumulative(self, cumulative):
+        """Index drawn with probability proportional to the weights whose running sum is the array cumulative.
+
+        One binary search replaces np.random.choice(p=...), which validates and
+        normalizes the probabilities on every call.
+        """
+        return int(cumulative.searchsorted(self.random() * cumulative[-1], side="right"))
@@ -0,0 +1,142 @@
+import importlib
+import os
+from random_streams import RandomStream
+
+
+class _Entry:
+    """A class referenced as "module:attribute", imported on first use."""
+
+    def __init__(self, target, neural=False, depth_argument=None):
+        self.target = target
+        self.neural = neural  # Needs torch and the policy-value network
+        self.depth_argument = depth_argument  # Constructor argument fed from the simulation depth setting
+        self._cls = None
+
+    def load(self):
+        if self._cls is None:
+            module, attribute = self.target.split(":")
+            self._cls = getattr(importlib.import_module(module), attribute)
+        return self._cls
+
+
+# Environments and MCTS variants by the name shown in the GUI and accepted on the command line
+ENVIRONMENTS = {}
+VARIANTS = {}
+
+WEIGHTS_DIR = "weights"  # Trained networks written by self_play.py, one file per environment
+PARALLEL_BATCH_SIZE = 8  # Leaves evaluated and backpropagated together with Parallel MCTS
+DETERMINISTIC_SEED = 0  # Seed of the searches run with the Deterministic preset
+
+# Use cases switched on by each optimization preset of the GUI
+PRESETS = {
+    "Performance": ("parallel", "virtual_loss", "rave"),
+    "Memory Efficient": ("pruning", "transposition"),
+    "ML Enhanced": ("ml_policy", "heuristic"),
+    "Deterministic": ("progressive", "heuristic"),
+}
+
+
+def register_environment(name, target):
+    ENVIRONMENTS[name] = _Entry(target)
+
+
+def register_variant(name, target, neural=False, depth_argument=None):
+    VARIANTS[name] = _Entry(target, neural, depth_argument)
+
+
+register_environment("Simple", "environment:SimpleEnvironment")
+register_environment("Breakthrough", "environment:BreakthroughEnvironment")
+register_environment("Connect Four", "environment:ConnectFourEnvironment")
+register_environment("Tic-Tac-Toe", "environment:TicTacToeEnvironment")
+
+register_variant("Basic MCTS", "mcts:MCTS")
+register_variant("Nested MCTS", "mcts:NestedMCTS", depth_argument="nesting_level")
+register_variant("NRPA", "mcts:NRPA")
+register_variant("AlphaZero MCTS", "alphazero:AlphaZeroMCTS", neural=True)
+
+
+def environment_names():
+    return list(ENVIRONMENTS)
+
+
+def variant_names():
+    return list(VARIANTS)
+
+
+def is_neural(variant_name):
+    return variant_name in VARIANTS and VARIANTS[variant_name].neural
+
+
+def environment_slug(name):
+    """File name stem for the per-environment files (weights, replay chunks, endgame tables)."""
+    return name.lower().replace(" ", "_").replace("-", "_")
+
+
+def weights_path(env_name):
+    """Default location of the trained weights of an environment."""
+    return os.path.join(WEIGHTS_DIR, environment_slug(env_name) + ".pt")
+
+
+def create_environment(name):
+    """Instantiate an environment by name; raises ValueError for unknown names."""
+    if name not in ENVIRONMENTS:
+        raise ValueError(f"Unknown environment: {name}")
+    return ENVIRONMENTS[name].load()()
+
+
+def create_mcts(variant_name, environment, iterations, exploration_weight=1.4, depth=2,
+                env_name=None, weights_path=None, **options):
+    """Instantiate an MCTS variant by name; raises ValueError for unknown names.
+
+    Neural variants load trained weights from weights_path when it exists
+    (env_name selects the network shape) unless a network is passed in the
+    options; torch is only imported for them. Other options (e.g. network,
+    inference) are passed on to the constructor.
+    """
+    if variant_name not in VARIANTS:
+        raise ValueError(f"Unknown MCTS variant: {variant_name}")
+    entry = VARIANTS[variant_name]
+    kwargs = dict(options, exploration_weight=exploration_weight)
+    if entry.depth_argument is not None:
+        kwargs[entry.depth_argument] = depth
+    if entry.neural and "network" not in kwargs and weights_path and env_name and os.path.exists(weights_path):
+        from self_play import load_network
+        kwargs["network"] = load_network(env_name, weights_path)
+    return entry.load()(environment, iterations, **kwargs)
+
+
+def configure_mcts(mcts, use_cases, depth=2, env_name=None, seed=None):
+    """Apply the enabled use cases (names as in the GUI) that change how a search runs.
+
+    A seed (an int or a numpy SeedSequence) makes the search reproducible;
+    neural variants then also seed their untrained network and use the
+    reference inference backend.
+    Returns notes about use cases that could not be applied, e.g. a missing
+    endgame table.
+    """
+    notes = []
+    if seed is not None:
+        mcts.rng = RandomStream(seed)
+        if hasattr(mcts, "make_reproducible"):
+            mcts.make_reproducible()
+
+    # The solver's win/loss logic assumes alternating players
+    mcts.solver = "solver" in use_cases and mcts.two_player
+
+    # Short random playouts scored by the environment heuristic
+    if "heuristic" in use_cases:
+        mcts.rollout_depth = depth
+
+    # Select leaves under virtual loss and evaluate/backpropagate them in batches
+    if "parallel" in use_cases:
+        mcts.batch_size = PARALLEL_BATCH_SIZE
+
+    # Exact values from a perfect-play table, if one was built for this environment
+    if "endgame" in use_cases and env_name is not None:
+        from endgame import EndgameTable, table_path
+        path = table_path(env_name)
+        if os.path.exists(path):
+            mcts.endgame_table = EndgameTable(path)
+        else:
+            notes.append(f"No endgame table at {path}; run endgame.py to build it.")
+    return notes
@@ -0,0 +1,106 @@
+import os
+import numpy as np
+
+
+def sample_dtype(state_size, policy_size):
+    """Record layout of one self-play sample."""
+    return np.dtype([
+        ("state", np.float32, (state_size,)),
+        ("policy", np.float32, (policy_size,)),
+        ("outcome", np.float32),
+    ])
+
+
+class ReplayBufferWriter:
+    """Appends self-play samples to fixed-size chunk files in a shared directory.
+
+    Each writer (one per actor process) fills a chunk in memory and
+    publishes it as a .npy file with an atomic rename, so readers only ever
+    see complete chunks.
+    """
+
+    def __init__(self, directory, state_size, policy_size, chunk_size=1024, prefix="actor"):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.prefix = prefix
+        self.dtype = sample_dtype(state_size, policy_size)
+        self._chunk = np.zeros(chunk_size, dtype=self.dtype)
+        self._size = 0
+        self._sequence = 0
+
+    def add(self, state, policy, outcome):
+        record = self._chunk[self._size]
+        record["state"] = state
+        record["policy"] = policy
+        record["outcome"] = outcome
+        self._size += 1
+        if self._size == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Publish the samples collected so far as a chunk file."""
+        if self._size == 0:
+            return
+        name = f"{self.prefix}_{os.getpid()}_{self._sequence:06d}.npy"
+        tmp_path = os.path.join(self.directory, name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, self._chunk[:self._size])
+        os.replace(tmp_path, os.path.join(self.directory, name))
+        self._sequence += 1
+        self._size = 0
+
+
+class ReplayBuffer:
+    """Samples minibatches from the newest chunk files of a replay directory.
+
+    Chunks are opened with np.load(mmap_mode="r"), so only the sampled
+    records are read from disk. Chunks beyond the capacity window are
+    deleted when the buffer is refreshed.
+    """
+
+    def __init__(self, directory, capacity=100000, rng=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.capacity = capacity
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self._chunks = {}  # File name -> memory-mapped records
+        self._order = []  # Chunk names, oldest first
+        self._offsets = np.zeros(1, dtype=np.int64)  # Cumulative sample counts over _order
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def refresh(self):
+        """Pick up chunks published since the last refresh and drop the oldest ones."""
+        names = [name for name in os.listdir(self.directory) if name.endswith(".npy")]
+        paths = {name: os.path.join(self.directory, name) for name in names}
+        names.sort(key=lambda name: (os.path.getmtime(paths[name]), name))
+        for name in names:
+            if name not in self._chunks:
+                self._chunks[name] = np.load(paths[name], mmap_mode="r")
+
+        # Keep the newest chunks that fit in the capacity window
+        kept = []
+        total = 0
+        for name in reversed(names):
+            if total >= self.capacity:
+                del self._chunks[name]
+                os.remove(paths[name])
+                continue
+            kept.append(name)
+            total += len(self._chunks[name])
+        self._order = kept[::-1]
+        self._offsets = np.concatenate(([0], np.cumsum([len(self._chunks[name]) for name in self._order])))
+
+    def sample(self, batch_size):
+        """Return (states, policies, outcomes) arrays for a uniformly sampled minibatch."""
+        if len(self) == 0:
+            raise ValueError("The replay buffer is empty")
+        indices = np.sort(self.rng.integers(0, len(self), size=batch_size))
+        chunk_ids = np.searchsorted(self._offsets, indices, side="right") - 1
+        records = np.empty(batch_size, dtype=self._chunks[self._order[0]].dtype)
+        for chunk_id in np.unique(chunk_ids):
+            mask = chunk_ids == chunk_id
+            records[mask] = self._chunks[self._order[chunk_id]][indices[mask] - self._offsets[chunk_id]]
+        return records["state"], records["policy"], records["outcome"]
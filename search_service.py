@@ -0,0 +1,349 @@
+import argparse
+import asyncio
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+from mcts import Node
+from registry import is_neural, create_environment, create_mcts, configure_mcts
+
+
+class SharedEvaluator:
+    """Pools the network calls of concurrent searches into shared batches.
+
+    Callers block in __call__ while a background thread gathers pending
+    requests into one batch, runs it through the inference backend and
+    hands every caller its slice of the result. A batch is run as soon as
+    every attached search is waiting on it, when max_batch states are
+    pending, or after max_wait seconds, whichever comes first.
+    """
+
+    def __init__(self, inference, max_batch=256, max_wait=0.002):
+        self.inference = inference
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.samples = 0
+        self._active = 0  # Searches currently using the evaluator
+        self._lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def attach(self):
+        with self._lock:
+            self._active += 1
+
+    def detach(self):
+        with self._lock:
+            self._active -= 1
+        self._requests.put(())  # Wake the batching thread: the remaining searches may all be waiting
+
+    def refresh(self):
+        self.inference.refresh()
+
+    def close(self):
+        self._requests.put(None)
+
+    def __call__(self, states):
+        future = Future()
+        self._requests.put((np.asarray(states, dtype=np.float32), future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = []
+            size = 0
+            deadline = None
+            while size < self.max_batch:
+                if deadline is None:
+                    item = self._requests.get()
+                else:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = self._requests.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                if item is None:
+                    self._evaluate(batch)
+                    return
+                if item:
+                    batch.append(item)
+                    size += len(item[0])
+                if batch and len(batch) >= self._active:
+                    break  # Nobody else can add to this batch
+                if batch and deadline is None:
+                    deadline = time.monotonic() + self.max_wait
+            self._evaluate(batch)
+
+    def _evaluate(self, batch):
+        if not batch:
+            return
+        try:
+            policy, values = self.inference(np.concatenate([states for states, _ in batch]))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        offset = 0
+        for states, future in batch:
+            future.set_result((policy[offset:offset + len(states)], values[offset:offset + len(states)]))
+            offset += len(states)
+        self.batches += 1
+        self.samples += offset
+
+
+def decode_state(state):
+    """JSON state -> environment state: {"board": [[...]], "player": p} or a plain number."""
+    if isinstance(state, dict):
+        return ([list(row) for row in state["board"]], state["player"])
+    return state
+
+
+def check_state(state, initial):
+    """Raise ValueError unless state has the form of the environment's initial state."""
+    if isinstance(initial, tuple):
+        board, player = initial
+        if not isinstance(state, tuple):
+            raise ValueError("The state must be a {\"board\": ..., \"player\": ...} object")
+        rows = state[0]
+        if len(rows) != len(board) or any(len(row) != len(board[0]) for row in rows):
+            raise ValueError(f"The board must have {len(board)} rows of {len(board[0])} cells")
+        if any(cell not in (-1, 0, 1) for row in rows for cell in row) or state[1] not in (-1, 1):
+            raise ValueError("Cells must be -1, 0 or 1 and the player -1 or 1")
+    elif isinstance(state, bool) or not isinstance(state, int):
+        raise ValueError("The state must be an integer")
+
+
+def encode_action(action):
+    return list(action) if isinstance(action, tuple) else action
+
+
+class SearchService:
+    """Runs search requests concurrently on a thread pool.
+
+    Neural searches of the same environment share one network and one
+    SharedEvaluator, so their leaf evaluations are batched together. At most
+    max_pending requests are in flight per service; further lines are not
+    read until one finishes, which pushes back on the client.
+    """
+
+    def __init__(self, workers=4, max_pending=64, batch_size=8, max_batch=256, max_wait=0.002, weights_path=None):
+        self.executor = ThreadPoolExecutor(workers)
+        self.max_pending = max_pending
+        self.batch_size = batch_size  # Leaves per round of a neural search
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.weights_path = weights_path
+        self.evaluators = {}  # Environment name -> (network, SharedEvaluator)
+        self.served = 0
+        self.timed_out = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._slots = None
+
+    def stats(self):
+        batches = sum(evaluator.batches for _, evaluator in self.evaluators.values())
+        samples = sum(evaluator.samples for _, evaluator in self.evaluators.values())
+        return {
+            "served": self.served,
+            "timed_out": self.timed_out,
+            "failed": self.failed,
+            "nn_batches": batches,
+            "avg_nn_batch": samples / batches if batches else 0.0,
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        for _, evaluator in self.evaluators.values():
+            evaluator.close()
+
+    def _evaluator(self, env_name):
+        with self._lock:
+            if env_name not in self.evaluators:
+                from inference import auto_backend
+                from self_play import build_network, load_network
+                if self.weights_path:
+                    network = load_network(env_name, self.weights_path)
+                else:
+                    network = build_network(env_name)
+                    network.eval()
+                evaluator = SharedEvaluator(auto_backend(network), self.max_batch, self.max_wait)
+                self.evaluators[env_name] = (network, evaluator)
+            return self.evaluators[env_name]
+
+    def search(self, request, deadline=None):
+        """Run one search request (a dict) in the calling thread and return the response dict."""
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError("Deadline exceeded before the search started")
+        env_name = request.get("env", "Simple")
+        variant = request.get("variant", "Basic MCTS")
+        iterations = int(request.get("iterations", 1000))
+        environment = create_environment(env_name)
+        if "state" in request:
+            state = decode_state(request["state"])
+            check_state(state, environment.state)
+            environment.set_state(state)
+
+        options = {}
+        evaluator = None
+        if is_neural(variant) and request.get("seed") is None:
+            network, evaluator = self._evaluator(env_name)
+            options = {"network": network, "inference": evaluator}
+        elif is_neural(variant) and self.weights_path:
+            # Seeded searches evaluate on their own with the reference backend, so they repeat exactly
+            options = {"network": self._evaluator(env_name)[0]}
+        mcts = create_mcts(variant, environment, iterations, float(request.get("exploration", 1.4)),
+                           int(request.get("depth", 2)), env_name=env_name, **options)
+        use_cases = set(request.get("use_cases", ()))
+        if request.get("solver"):
+            use_cases.add("solver")
+        if request.get("heuristic"):
+            use_cases.add("heuristic")
+        configure_mcts(mcts, use_cases, int(request.get("depth", 2)), env_name, request.get("seed"))
+        if evaluator is not None:
+            mcts.batch_size = self.batch_size
+            evaluator.attach()
+
+        start = time.monotonic()
+        root = Node(environment.state)
+        try:
+            done = mcts.search_until(root, iterations, deadline)
+        finally:
+            if evaluator is not None:
+                evaluator.detach()
+        timed_out = done < iterations and root.proven is None
+
+        children = [
+            {"action": encode_action(child.action), "visits": child.visits,
+             "value": child.value / child.visits if child.visits else 0.0}
+            for child in root.children
+        ]
+        action = mcts.best_action(root)
+        best = children[[child.action for child in root.children].index(action)] if children else None
+        return {
+            "action": best["action"] if best else None,
+            "value": best["value"] if best else None,
+            "proven": root.proven,
+            "iterations": done,
+            "timed_out": timed_out,
+            "elapsed_ms": (time.monotonic() - start) * 1000,
+            "children": children,
+        }
+
+    async def handle_line(self, line):
+        """Parse one JSON request line, run it on the pool and return the response dict."""
+        received = time.monotonic()
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            self.failed += 1
+            return {"id": None, "error": f"Invalid JSON: {e}"}
+        if not isinstance(request, dict):
+            self.failed += 1
+            return {"id": None, "error": "A request must be a JSON object"}
+        request_id = request.get("id")
+        if request.get("command") == "stats":
+            return {"id": request_id, "stats": self.stats()}
+
+        loop = asyncio.get_running_loop()
+        try:
+            deadline = None
+            if request.get("deadline") is not None:
+                deadline = received + float(request["deadline"])
+            response = await loop.run_in_executor(self.executor, self.search, request, deadline)
+        except Exception as e:
+            # Any failure is reported to the client; it must not take the service down
+            self.failed += 1
+            return {"id": request_id, "error": str(e) or type(e).__name__}
+        self.served += 1
+        self.timed_out += response["timed_out"]
+        response["id"] = request_id
+        return response
+
+    async def serve_stream(self, reader, writer):
+        """Answer the JSON-line requests of one stream; responses are written as they complete."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(line):
+            try:
+                response = await self.handle_line(line)
+            finally:
+                self._slots.release()
+            async with write_lock:
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            await self._slots.acquire()  # Back-pressure: stop reading while max_pending requests are in flight
+            task = asyncio.create_task(respond(line))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+
+async def _stdio_streams():
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    return reader, writer
+
+
+async def serve(service, host=None, port=None):
+    """Serve JSON lines on a TCP socket if a port is given, on stdin/stdout otherwise."""
+    if port is None:
+        reader, writer = await _stdio_streams()
+        await service.serve_stream(reader, writer)
+        return
+
+    async def client(reader, writer):
+        try:
+            await service.serve_stream(reader, writer)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(client, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve MCTS searches as JSON lines over stdin/stdout or a TCP socket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="Listen on this port instead of stdin/stdout")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-pending", type=int, default=64, help="Requests in flight before reading stops")
+    parser.add_argument("--batch-size", type=int, default=8, help="Leaves per round of a neural search")
+    parser.add_argument("--max-batch", type=int, default=256, help="Largest shared network batch")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="Longest wait for a shared batch to fill")
+    parser.add_argument("--weights", default=None, help="Trained weights for neural variants")
+    args = parser.parse_args()
+
+    service = SearchService(args.workers, args.max_pending, args.batch_size, args.max_batch,
+                            args.max_wait_ms / 1000, args.weights)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
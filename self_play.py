@@ -0,0 +1,243 @@
+import argparse
+import multiprocessing as mp
+import os
+import queue
+import time
+import numpy as np
+import torch
+import torch.nn.functional as F
+from alphazero import AlphaZeroMCTS, ActionIndex
+from inference import auto_backend
+from neural_network import PolicyValueNetwork
+from registry import environment_names, environment_slug, weights_path as default_weights_path, create_environment
+from replay_buffer import ReplayBuffer, ReplayBufferWriter
+from random_streams import RandomStream
+
+INPUT_SIZE = 10  # Features seen by the network (see AlphaZeroMCTS._prepare_state_array)
+HIDDEN_SIZE = 64
+
+
+def action_size(env_name):
+    """Size of the policy head: one unit per move the environment can offer (see ActionIndex)."""
+    return ActionIndex(create_environment(env_name)).size
+
+
+def build_network(env_name, seed=None):
+    """Untrained network for an environment; a seed makes its initial weights reproducible."""
+    return PolicyValueNetwork(input_size=INPUT_SIZE, hidden_size=HIDDEN_SIZE, output_size=action_size(env_name),
+                              seed=seed)
+
+
+def load_network(env_name, path):
+    """Build the network for an environment and load trained weights into it.
+
+    Raises ValueError if the weights were trained for a network of another shape.
+    """
+    network = build_network(env_name)
+    try:
+        network.load_state_dict(torch.load(path))
+    except RuntimeError as e:
+        raise ValueError(f"{path} does not hold weights for {env_name}: {e}") from e
+    network.eval()
+    return network
+
+
+def publish_weights(network, path):
+    """Atomically replace the weights file read by the actors."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    torch.save(network.state_dict(), tmp_path)
+    os.replace(tmp_path, path)
+
+
+def play_game(env_name, network, iterations, rng, temperature_moves=4, max_moves=200, inference=None):
+    """Play one self-play game and return its (encoded state, policy, outcome) samples.
+
+    The policy target is the visit distribution over the root children,
+    each stored at the policy head unit of its action (see ActionIndex). The
+    outcome is from the point of view of the player to move in each state.
+    """
+    inference = inference if inference is not None else auto_backend(network)
+    environment = create_environment(env_name)
+    policy_size = network.policy_head.out_features
+    history = []
+    for move in range(max_moves):
+        if environment.is_terminal() or not environment.get_possible_actions():
+            break
+        mcts = AlphaZeroMCTS(environment, iterations, network=network, inference=inference)
+        mcts.rng = rng.spawn(1)[0]
+        root = mcts.search(environment.state)
+        visits = np.array([child.visits for child in root.children], dtype=np.float32)
+        if visits.sum() == 0:
+            break
+
+        policy = np.zeros(policy_size, dtype=np.float32)
+        policy[[mcts.action_index(child.action) for child in root.children]] = visits / visits.sum()
+        state = mcts._prepare_state_array(environment.state)[0]
+        player = getattr(environment, "current_player", 1)
+        history.append((state, policy, player))
+
+        # Sample proportionally to visits early in the game, then play the most visited move
+        if move < temperature_moves:
+            index = rng.sample_cumulative(np.cumsum(visits))
+        else:
+            index = int(np.argmax(visits))
+        environment.apply_action(root.children[index].action)
+
+    winner = environment.get_winner()
+    return [(state, policy, float(winner * player)) for state, policy, player in history]
+
+
+def actor_loop(actor_id, env_name, buffer_dir, weights_path, iterations, chunk_size, stop_event, stats_queue,
+               seed=None):
+    """Self-play worker: plays games with the latest published weights and writes samples to the buffer.
+
+    seed is the actor's SeedSequence, spawned from the run's seed.
+    """
+    torch.set_num_threads(1)
+    rng = RandomStream(seed)
+    network = build_network(env_name)
+    network.eval()
+    inference = auto_backend(network)
+    writer = ReplayBufferWriter(
+        buffer_dir, INPUT_SIZE, network.policy_head.out_features, chunk_size, prefix=f"actor{actor_id}"
+    )
+    weights_mtime = None
+
+    while not stop_event.is_set():
+        # Hot-reload the weights when the trainer published new ones
+        try:
+            mtime = os.path.getmtime(weights_path)
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime != weights_mtime:
+            network.load_state_dict(torch.load(weights_path))
+            inference.refresh()
+            weights_mtime = mtime
+
+        with torch.inference_mode():
+            samples = play_game(env_name, network, iterations, rng, inference=inference)
+        for state, policy, outcome in samples:
+            writer.add(state, policy, outcome)
+        stats_queue.put((actor_id, 1, len(samples)))
+    writer.flush()
+
+
+def train_step(network, optimizer, states, policies, outcomes):
+    """One gradient step on policy cross-entropy plus value mean squared error."""
+    states = torch.from_numpy(np.ascontiguousarray(states))
+    policies = torch.from_numpy(np.ascontiguousarray(policies))
+    outcomes = torch.from_numpy(np.ascontiguousarray(outcomes))
+    predicted_policy, predicted_value = network(states)
+    policy_loss = -(policies * torch.log(predicted_policy + 1e-8)).sum(dim=1).mean()
+    value_loss = F.mse_loss(predicted_value.squeeze(1), outcomes)
+    loss = policy_loss + value_loss
+    optimizer.zero_grad()
+    loss.backward()
+    optimizer.step()
+    return loss.item()
+
+
+def run_self_play(env_name, num_actors=4, iterations=100, buffer_dir="replay", weights_path=None,
+                  train_steps=1000, batch_size=256, min_samples=1024, publish_interval=100,
+                  capacity=100000, chunk_size=256, learning_rate=1e-3, log_interval=10.0, seed=None):
+    """Run self-play actors in worker processes and train the network in this process.
+
+    The actors' random streams, the initial weights and the minibatch
+    sampling are derived from seed; without one every run differs. Samples
+    go to a subdirectory of buffer_dir named after the environment, and the
+    weights to registry.weights_path(env_name) unless a path is given, so
+    runs on different environments never mix.
+    """
+    buffer_dir = os.path.join(buffer_dir, environment_slug(env_name))
+    weights_path = weights_path or default_weights_path(env_name)
+    seeds = np.random.SeedSequence(seed)
+    actor_seeds = seeds.spawn(num_actors)
+    network = build_network(env_name, int(seeds.generate_state(1)[0]) if seed is not None else None)
+    if os.path.exists(weights_path):
+        network = load_network(env_name, weights_path)
+        network.train()
+    else:
+        publish_weights(network, weights_path)
+    optimizer = torch.optim.Adam(network.parameters(), lr=learning_rate)
+    buffer = ReplayBuffer(buffer_dir, capacity, np.random.default_rng(seeds.spawn(1)[0]))
+
+    stop_event = mp.Event()
+    stats_queue = mp.Queue()
+    actors = [
+        mp.Process(
+            target=actor_loop,
+            args=(i, env_name, buffer_dir, weights_path, iterations, chunk_size, stop_event, stats_queue,
+                  actor_seeds[i]),
+            daemon=True,
+        )
+        for i in range(num_actors)
+    ]
+    for actor in actors:
+        actor.start()
+
+    games = samples = 0
+    start = last_log = time.time()
+    step = 0
+    loss = float("nan")
+    try:
+        while step < train_steps:
+            # Collect actor throughput reports
+            try:
+                while True:
+                    _, actor_games, actor_samples = stats_queue.get_nowait()
+                    games += actor_games
+                    samples += actor_samples
+            except queue.Empty:
+                pass
+
+            buffer.refresh()
+            if len(buffer) < min_samples:
+                time.sleep(0.5)
+            else:
+                loss = train_step(network, optimizer, *buffer.sample(batch_size))
+                step += 1
+                if step % publish_interval == 0:
+                    publish_weights(network, weights_path)
+
+            now = time.time()
+            if now - last_log >= log_interval:
+                elapsed = now - start
+                print(
+                    f"[{elapsed:7.1f}s] games {games} ({games / elapsed:.2f}/s)  "
+                    f"samples {samples} ({samples / elapsed:.1f}/s)  buffer {len(buffer)}  "
+                    f"step {step}  loss {loss:.4f}"
+                )
+                last_log = now
+    finally:
+        stop_event.set()
+        for actor in actors:
+            actor.join(timeout=30)
+        publish_weights(network, weights_path)
+    return network
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate self-play data with AlphaZero MCTS and train the policy-value network.")
+    parser.add_argument("--env", default="Tic-Tac-Toe", choices=environment_names())
+    parser.add_argument("--actors", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=100, help="MCTS iterations per move")
+    parser.add_argument("--buffer-dir", default="replay", help="Replay directory; each environment gets a subdirectory")
+    parser.add_argument("--weights", default=None, help="Weights file (default: weights/<environment>.pt)")
+    parser.add_argument("--train-steps", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--min-samples", type=int, default=1024)
+    parser.add_argument("--publish-interval", type=int, default=100)
+    parser.add_argument("--capacity", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the actors, initial weights and sampling")
+    args = parser.parse_args()
+
+    run_self_play(
+        args.env, args.actors, args.iterations, args.buffer_dir, args.weights,
+        args.train_steps, args.batch_size, args.min_samples, args.publish_interval, args.capacity,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import struct
+import numpy as np
+from mcts import Node
+from tree_utils import iter_tree
+
+MAGIC = b"MCTSTREE"
+VERSION = 1
+UNPROVEN = -128  # Value of the proven column for nodes the solver has not decided
+ALIGNMENT = 64  # Every column starts on an aligned offset so it can be memory-mapped on its own
+
+
+def _state_layout(state):
+    """Describe how states of this shape are encoded: (kind, board shape)."""
+    if isinstance(state, tuple) and len(state) == 2 and isinstance(state[0], (list, np.ndarray)):
+        board = state[0]
+        return "board", (len(board), len(board[0]))
+    return "int", ()
+
+
+def _encode_state(state, kind):
+    if kind == "board":
+        board, player = state
+        return [x for row in board for x in row] + [player]
+    return [state]
+
+
+def _decode_state(encoded, kind, shape):
+    if kind == "board":
+        rows, cols = shape
+        board = [[int(encoded[r * cols + c]) for c in range(cols)] for r in range(rows)]
+        return board, int(encoded[-1])
+    return int(encoded[0])
+
+
+def _columns(kind, shape):
+    """(name, dtype, width) of every column; width is the number of values per node (None for scalars)."""
+    if kind == "board":
+        state_column = ("state", np.int8, shape[0] * shape[1] + 1)
+    else:
+        state_column = ("state", np.int64, 1)
+    return [
+        ("visits", np.int64, None),
+        ("value", np.float64, None),
+        ("parent", np.int64, None),
+        ("first_child", np.int64, None),
+        ("num_children", np.int32, None),
+        ("action", np.int32, None),
+        ("state_hash", np.uint64, None),
+        ("proven", np.int8, None),
+        state_column,
+    ]
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _action_to_json(action):
+    return list(action) if isinstance(action, tuple) else action
+
+
+def _action_from_json(action):
+    return tuple(action) if isinstance(action, list) else action
+
+
+def save_tree(root, path, env_name=None):
+    """Write a search tree to a single binary file.
+
+    Nodes are numbered in breadth-first order, so the children of a node
+    are a contiguous range of ids. Each field (visits, value, parent id,
+    first child id, child count, action id, state hash, solver proof and
+    encoded state) is stored as its own contiguous column, aligned so it
+    can be memory-mapped and scanned without touching the others. env_name
+    records the environment the tree was searched in. The file is written
+    atomically, which makes it safe to use for periodic checkpoints of a
+    running search.
+    """
+    nodes = [node for node, _ in iter_tree(root, "bfs")]
+    kind, shape = _state_layout(root.state)
+
+    index = {node: i for i, node in enumerate(nodes)}
+    actions = {}
+    first_child = []
+    action_ids = []
+    next_child = 1
+    for node in nodes:
+        first_child.append(next_child if node.children else -1)
+        next_child += len(node.children)
+        if node.action is None:
+            action_ids.append(-1)
+        else:
+            key = json.dumps(_action_to_json(node.action))
+            action_ids.append(actions.setdefault(key, len(actions)))
+
+    dtypes = {name: dtype for name, dtype, _ in _columns(kind, shape)}
+    states = np.asarray([_encode_state(node.state, kind) for node in nodes], dtype=dtypes["state"])
+    values = {
+        "visits": [node.visits for node in nodes],
+        "value": [node.value for node in nodes],
+        "parent": [-1 if node.parent is None else index[node.parent] for node in nodes],
+        "first_child": first_child,
+        "num_children": [len(node.children) for node in nodes],
+        "action": action_ids,
+        "state_hash": [
+            int.from_bytes(hashlib.blake2b(row.tobytes(), digest_size=8).digest(), "little")
+            for row in states
+        ],
+        "proven": [UNPROVEN if node.proven is None else node.proven for node in nodes],
+    }
+    columns = {name: np.asarray(values[name], dtype=dtypes[name]) for name in values}
+    columns["state"] = states
+
+    # Column offsets are relative to the end of the header
+    offsets = {}
+    size = 0
+    for name, _, _ in _columns(kind, shape):
+        offsets[name] = size
+        size = _aligned(size + columns[name].nbytes)
+
+    header = json.dumps({
+        "count": len(nodes),
+        "environment": env_name,
+        "state_kind": kind,
+        "board_shape": list(shape),
+        "actions": [json.loads(key) for key in actions],
+        "offsets": offsets,
+    }).encode("utf-8")
+    prefix_size = len(MAGIC) + 8
+    header = header.ljust(_aligned(prefix_size + len(header)) - prefix_size, b" ")
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<II", VERSION, len(header)))
+        f.write(header)
+        data_start = f.tell()
+        for name, _, _ in _columns(kind, shape):
+            f.seek(data_start + offsets[name])
+            f.write(columns[name].tobytes())
+        f.truncate(data_start + size)
+    os.replace(tmp_path, path)
+
+
+class TreeSnapshot:
+    """Memory-mapped view of a saved tree; each column is only read when accessed."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a saved MCTS tree")
+            version, header_size = struct.unpack("<II", f.read(8))
+            if version != VERSION:
+                raise ValueError(f"Unsupported tree file version: {version}")
+            header = json.loads(f.read(header_size).decode("utf-8"))
+
+        self.env_name = header["environment"]  # None if the tree was saved without one
+        self.state_kind = header["state_kind"]
+        self.board_shape = tuple(header["board_shape"])
+        self.actions = [_action_from_json(a) for a in header["actions"]]
+        count = header["count"]
+        data_start = len(MAGIC) + 8 + header_size
+        columns = {}
+        for name, dtype, width in _columns(self.state_kind, self.board_shape):
+            columns[name] = np.memmap(path, dtype=dtype, mode="r", offset=data_start + header["offsets"][name],
+                                      shape=(count,) if width is None else (count, width))
+
+        # Parallel arrays over all nodes, indexed by node id (0 is the root)
+        self.visits = columns["visits"]
+        self.values = columns["value"]
+        self.parents = columns["parent"]
+        self.first_children = columns["first_child"]
+        self.num_children = columns["num_children"]
+        self.action_ids = columns["action"]
+        self.state_hashes = columns["state_hash"]
+        self.proven = columns["proven"]
+        self.states = columns["state"]
+
+    def __len__(self):
+        return len(self.visits)
+
+    def children(self, i):
+        """Return the ids of the children of node i."""
+        first = int(self.first_children[i])
+        if first < 0:
+            return range(0)
+        return range(first, first + int(self.num_children[i]))
+
+    def action(self, i):
+        action_id = int(self.action_ids[i])
+        return None if action_id < 0 else self.actions[action_id]
+
+    def state(self, i):
+        return _decode_state(self.states[i], self.state_kind, self.board_shape)
+
+    def to_nodes(self):
+        """Rebuild the Node objects of the whole tree and return the root."""
+        parents = self.parents.tolist()
+        visits = self.visits.tolist()
+        values = self.values.tolist()
+        proven = self.proven.tolist()
+        nodes = []
+        for i in range(len(self)):
+            parent = nodes[parents[i]] if parents[i] >= 0 else None
+            node = Node(self.state(i), parent=parent, action=self.action(i))
+            node.visits = visits[i]
+            node.value = values[i]
+            node.proven = None if proven[i] == UNPROVEN else proven[i]
+            if parent is not None:
+                parent.children.append(node)
+            nodes.append(node)
+        return nodes[0]
+
+
+def load_tree(path, env_name=None):
+    """Load a tree saved with save_tree and return its root Node.
+
+    With env_name, raises ValueError if the tree was searched in another
+    environment (or saved without one).
+    """
+    snapshot = TreeSnapshot(path)
+    if env_name is not None and snapshot.env_name != env_name:
+        searched_in = snapshot.env_name or "an unrecorded environment"
+        raise ValueError(f"The tree was searched in {searched_in}, not {env_name}")
+    return snapshot.to_nodes()
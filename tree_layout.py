@@ -0,0 +1,200 @@
+from tree_utils import iter_tree
+
+
+class _SubtreeShape:
+    """Cached layout of a subtree, relative to its root."""
+    __slots__ = ("signature", "offsets", "left", "right", "height", "low", "high")
+
+    def __init__(self, signature, offsets, left, right, height, low, high):
+        self.signature = signature  # Children the shape was computed for
+        self.offsets = offsets  # Horizontal offset of each child from the subtree root
+        self.left = left  # Contour of the leftmost x at each depth
+        self.right = right  # Contour of the rightmost x at each depth
+        self.height = height  # Number of depths in the contours
+        self.low = low  # Leftmost x anywhere in the subtree
+        self.high = high  # Rightmost x anywhere in the subtree
+
+
+# Contours are immutable linked lists of (x, next cell, shift of next cell) cells,
+# referenced through (cell, shift) pointers: the level a pointer designates is at
+# shift + cell[0], the next level at shift + cell[2] + cell[1][0]. Shifting a
+# contour is O(1) and subtrees share their contours with their ancestors, so a
+# merge only touches the depths the two packed contours have in common.
+
+def _walk(pointer, depth):
+    """Pointer to the level depth levels below pointer."""
+    cell, shift = pointer
+    for _ in range(depth):
+        shift += cell[2]
+        cell = cell[1]
+    return cell, shift
+
+
+def _join(head, count, tail):
+    """Contour made of the first count levels of head followed by the levels of tail."""
+    values = []
+    cell, shift = head
+    for _ in range(count):
+        values.append(shift + cell[0])
+        shift += cell[2]
+        cell = cell[1]
+    cell, shift = tail
+    for x in reversed(values):
+        cell, shift = (x, cell, shift), 0.0
+    return cell, shift
+
+
+_LEAF = ((0.0, None, 0.0), 0.0)
+
+
+class TreeLayout:
+    """Reingold-Tilford tidy-tree layout with per-subtree caching.
+
+    Each subtree is packed against its left siblings using its contours
+    (the extreme x positions at each depth), and its parent is centered
+    above its first and last child. The shape of every subtree is cached
+    per node and only recomputed when its list of children changed or one
+    of its children was recomputed, so growing a search tree only re-lays
+    out the paths leading to the new nodes.
+
+    The layout does not depend on tkinter and returns positions in slot
+    units (one unit between adjacent nodes), so it can be used headlessly.
+    """
+
+    def __init__(self, children_of=None, separation=1.0):
+        self.children_of = children_of or (lambda node: node.children)
+        self.separation = separation
+        self.children = {}  # Node -> children laid out during the last pass
+        self._shapes = {}  # Node -> _SubtreeShape
+
+    def layout(self, root):
+        """Return a dict mapping every node to its (x, depth) position."""
+        # Pre-order walk collecting the children to lay out
+        children = {}
+
+        def collect(node):
+            kids = children[node] = list(self.children_of(node))
+            return kids
+
+        order = list(iter_tree(root, children_of=collect))
+
+        # Bottom-up pass, recomputing only the subtrees whose structure changed
+        changed = set()
+        for node, _ in reversed(order):
+            kids = children[node]
+            signature = tuple(kids)
+            shape = self._shapes.get(node)
+            if shape is None or shape.signature != signature or any(kid in changed for kid in kids):
+                self._shapes[node] = self._place_children(signature)
+                changed.add(node)
+
+        # Forget nodes that are no longer laid out
+        if len(self._shapes) != len(order):
+            self._shapes = {node: self._shapes[node] for node, _ in order}
+        self.children = children
+
+        # Top-down pass turning relative offsets into positions
+        xs = {root: 0.0}
+        positions = {}
+        for node, depth in order:
+            x = xs[node]
+            positions[node] = (x, depth)
+            for child, offset in zip(children[node], self._shapes[node].offsets):
+                xs[child] = x + offset
+        return positions
+
+    def extent(self, node):
+        """Return the (left, right) extent of the subtree of a node, relative to the node."""
+        shape = self._shapes[node]
+        return shape.low, shape.high
+
+    def _place_children(self, kids):
+        """Pack the subtrees of the children side by side and center the parent above them.
+
+        Each kid is compared with the packed siblings only down to the
+        shallower of the two contours, which keeps a full layout O(n).
+        """
+        if not kids:
+            return _SubtreeShape(kids, (), _LEAF, _LEAF, 1, 0.0, 0.0)
+
+        first = self._shapes[kids[0]]
+        positions = [0.0]
+        left, right, height = first.left, first.right, first.height
+        low, high = first.low, first.high
+        for kid in kids[1:]:
+            shape = self._shapes[kid]
+            # Smallest shift keeping the kid clear of its left siblings at every shared depth
+            shift = float("-inf")
+            (r_cell, r_shift), (l_cell, l_shift) = right, shape.left
+            for _ in range(min(height, shape.height)):
+                shift = max(shift, (r_shift + r_cell[0]) - (l_shift + l_cell[0]) + self.separation)
+                r_shift += r_cell[2]
+                r_cell = r_cell[1]
+                l_shift += l_cell[2]
+                l_cell = l_cell[1]
+            positions.append(shift)
+
+            kid_left = (shape.left[0], shape.left[1] + shift)
+            kid_right = (shape.right[0], shape.right[1] + shift)
+            if shape.height >= height:
+                right = kid_right
+            else:
+                right = _join(kid_right, shape.height, _walk(right, shape.height))
+            if height < shape.height:
+                left = _join(left, height, _walk(kid_left, height))
+            height = max(height, shape.height)
+            low = min(low, shape.low + shift)
+            high = max(high, shape.high + shift)
+
+        center = (positions[0] + positions[-1]) / 2
+        return _SubtreeShape(
+            kids,
+            tuple(p - center for p in positions),
+            ((0.0, left[0], left[1] - center), 0.0),
+            ((0.0, right[0], right[1] - center), 0.0),
+            height + 1,
+            min(0.0, low - center),
+            max(0.0, high - center),
+        )
+
+
+def layout_positions(root, x_spacing=80, y_spacing=120, margin=50, children_of=None):
+    """Lay out a tree headlessly and return a dict mapping nodes to pixel (x, y) positions."""
+    positions = TreeLayout(children_of).layout(root)
+    min_x = min(x for x, _ in positions.values())
+    return {
+        node: ((x - min_x) * x_spacing + margin, depth * y_spacing + margin)
+        for node, (x, depth) in positions.items()
+    }
+
+
+def export_svg(root, path, x_spacing=80, y_spacing=120, node_size=30):
+    """Write the laid-out tree to an SVG file, labelling nodes with their mean value and visits."""
+    margin = node_size + 10
+    positions = layout_positions(root, x_spacing, y_spacing, margin)
+    width = max(x for x, _ in positions.values()) + margin
+    height = max(y for _, y in positions.values()) + margin
+
+    lines = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}">']
+    for node, (x, y) in positions.items():
+        for child in node.children:
+            cx, cy = positions[child]
+            lines.append(
+                f'<line x1="{x:.1f}" y1="{y + node_size:.1f}" x2="{cx:.1f}" y2="{cy - node_size:.1f}" '
+                f'stroke="black" stroke-width="2"/>'
+            )
+    for node, (x, y) in positions.items():
+        visit_ratio = 0 if node.visits == 0 else node.value / node.visits
+        lines.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{node_size}" fill="#607D8B" stroke="black" stroke-width="2"/>')
+        lines.append(
+            f'<text x="{x:.1f}" y="{y - 4:.1f}" font-family="Arial" font-size="8" fill="white" '
+            f'text-anchor="middle">V: {visit_ratio:.2f}</text>'
+        )
+        lines.append(
+            f'<text x="{x:.1f}" y="{y + 10:.1f}" font-family="Arial" font-size="8" fill="white" '
+            f'text-anchor="middle">N: {node.visits}</text>'
+        )
+    lines.append("</svg>")
+
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
@@ -0,0 +1,52 @@
+from collections import deque
+
+
+def iter_tree(root, order="dfs", children_of=None):
+    """Yield (node, depth) pairs in depth-first pre-order or breadth-first order.
+
+    Uses an explicit stack/queue instead of recursion, so arbitrarily deep
+    trees (e.g. long chains in the Simple environment) can be walked without
+    hitting Python's recursion limit.
+    """
+    children_of = children_of or (lambda node: node.children)
+    if order == "dfs":
+        stack = [(root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            yield node, depth
+            children = children_of(node)
+            for i in range(len(children) - 1, -1, -1):
+                stack.append((children[i], depth + 1))
+    elif order == "bfs":
+        queue = deque([(root, 0)])
+        while queue:
+            node, depth = queue.popleft()
+            yield node, depth
+            for child in children_of(node):
+                queue.append((child, depth + 1))
+    else:
+        raise ValueError(f"Unknown traversal order: {order}")
+
+
+def tree_stats(root):
+    """Compute the size, depth and branching statistics of a tree."""
+    nodes = 0
+    leaves = 0
+    edges = 0
+    max_depth = 0
+    for node, depth in iter_tree(root):
+        nodes += 1
+        num_children = len(node.children)
+        if num_children:
+            edges += num_children
+        else:
+            leaves += 1
+        if depth > max_depth:
+            max_depth = depth
+    internal = nodes - leaves
+    return {
+        "nodes": nodes,
+        "leaves": leaves,
+        "max_depth": max_depth,
+        "avg_branching": edges / internal if internal else 0.0,
+    }
@@ -1,5 +1,16 @@
 import tkinter as tk
 import math
+from tree_layout import TreeLayout
+
+
+class _CollapsedChildren:
+    """Layout slot standing for the children of a node hidden by the level-of-detail filter."""
+    children = ()
+
+    def __init__(self, parent):
+        self.parent = parent
+        self.hidden = []
+
 
 class Visualization:
     def __init__(self, canvas):
@@ -17,139 +28,291 @@ class Visualization:
         self.zoom = 1.0
         self.canvas_width = 1200  # Default canvas width
         self.canvas_height = 800  # Default canvas height
+        self.items = {}  # Node -> canvas item ids and last drawn attributes
+        self.glyphs = {}  # Parent node -> canvas items of its collapsed children
+        self._seen = set()  # Nodes drawn during the current update
+        self._seen_glyphs = set()  # Nodes whose collapsed glyph was drawn during the current update
+        
+        # Level of detail
+        self.min_visits = 0  # Children with fewer visits are collapsed
+        self.top_k = None  # Maximum number of children drawn per node (None = all)
+        self.expanded = set()  # Nodes the user expanded to show every child
+        self._viewport = None  # Visible area in layout coordinates
+        self._root = None
+        
+        # Tidy-tree layout, cached between frames
+        self.layout = TreeLayout(children_of=self._layout_children)
+        self.margin = 50
+        self._collapsed = {}  # Node -> _CollapsedChildren slot
+        self._min_x = 0.0
 
     def update(self, root):
         """Update the visualization with the current tree."""
-        # Clear the canvas
-        self.canvas.delete("all")
+        self._root = root
+        self._seen = set()
+        self._seen_glyphs = set()
+        self._viewport = self._visible_area()
         
-        # Calculate tree depth and width
-        max_depth, node_counts = self._analyze_tree(root)
-        
-        # Adjust canvas size if needed
-        self._adjust_canvas_size(max_depth, max(node_counts.values()) if node_counts else 1)
+        # Lay out the visible tree and size the canvas to it
+        positions = self.layout.layout(root)
+        xs = [x for x, _ in positions.values()]
+        self._min_x = min(xs)
+        max_depth = max(depth for _, depth in positions.values())
+        self._adjust_canvas_size(max_depth, max(xs) - self._min_x)
         
         # Draw tree
-        center_x = self.canvas_width / 2
-        self._draw_node(root, center_x, 50, 0, node_counts)
+        self._draw_tree(root, positions)
         
-        # Update canvas scroll region
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-    
-    def _analyze_tree(self, node, depth=0, node_counts=None):
-        """Analyze the tree to determine its depth and width at each level."""
-        if node_counts is None:
-            node_counts = {}
-            
-        # Update count for this depth level
-        if depth not in node_counts:
-            node_counts[depth] = 0
-        node_counts[depth] += 1
+        # Remove items of nodes that are no longer part of the tree
+        for node in [n for n in self.items if n not in self._seen]:
+            self._remove_node(node)
+        for node in [n for n in self.glyphs if n not in self._seen_glyphs]:
+            self._remove_glyph(node)
         
-        # Recursively analyze children
-        max_depth = depth
-        for child in node.children:
-            child_depth, _ = self._analyze_tree(child, depth + 1, node_counts)
-            max_depth = max(max_depth, child_depth)
-            
-        return max_depth, node_counts
+        # Update canvas scroll region from the layout, since culled nodes have no items
+        self.canvas.configure(scrollregion=self._scaled(0, 0, self.canvas_width, self.canvas_height))
     
-    def _adjust_canvas_size(self, depth, max_width):
+    def refresh(self):
+        """Redraw the last tree, e.g. after the viewport or detail settings changed."""
+        if self._root is not None:
+            self.update(self._root)
+
+    def clear(self):
+        """Remove every item from the canvas and forget the drawn nodes."""
+        self.canvas.delete("all")
+        self.items = {}
+        self.glyphs = {}
+        self.layout = TreeLayout(children_of=self._layout_children)
+        self._collapsed = {}
+        self.expanded = set()
+        self._seen = set()
+        self._seen_glyphs = set()
+        self._root = None
+
+    def toggle_expand(self, node):
+        """Show or collapse the children hidden by the level-of-detail filter."""
+        if node in self.expanded:
+            self.expanded.discard(node)
+        else:
+            self.expanded.add(node)
+        self.refresh()
+
+    def _visible_children(self, node):
+        """Split the children of a node into the drawn ones and the collapsed ones."""
+        if node in self.expanded or (self.min_visits <= 0 and self.top_k is None):
+            return node.children, []
+        ranked = sorted(node.children, key=lambda c: c.visits, reverse=True)
+        limit = len(ranked) if self.top_k is None else self.top_k
+        shown = [c for c in ranked[:limit] if c.visits >= self.min_visits]
+        return shown, ranked[len(shown):]
+
+    def _visible_area(self):
+        """Return the visible canvas area in layout coordinates, or None if unknown."""
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        if width <= 1 or height <= 1:  # Canvas not mapped yet
+            return None
+        margin = self.node_size * 2
+        return (
+            self.canvas.canvasx(0) / self.zoom - margin,
+            self.canvas.canvasy(0) / self.zoom - margin,
+            self.canvas.canvasx(width) / self.zoom + margin,
+            self.canvas.canvasy(height) / self.zoom + margin,
+        )
+
+    def _in_viewport(self, x, y):
+        if self._viewport is None:
+            return True
+        left, top, right, bottom = self._viewport
+        return left <= x <= right and top <= y <= bottom
+
+    def _adjust_canvas_size(self, depth, layout_width):
         """Adjust canvas size based on tree dimensions."""
-        min_width = max(1200, max_width * self.node_spacing)
-        min_height = max(800, (depth + 1) * self.level_spacing)
+        min_width = max(1200, layout_width * self.node_spacing + 2 * self.margin)
+        min_height = max(800, depth * self.level_spacing + 2 * self.margin)
         
         self.canvas_width = min_width
         self.canvas_height = min_height
     
-    def _draw_node(self, node, x, y, depth, node_counts, is_best_path=False):
-        """Draw a node and its children recursively."""
-        if node is None:
-            return
+    def _layout_children(self, item):
+        """Children laid out for an item: the visible children plus a collapsed slot if any are hidden."""
+        if isinstance(item, _CollapsedChildren):
+            return ()
+        shown, hidden = self._visible_children(item)
+        if not hidden:
+            self._collapsed.pop(item, None)
+            return shown
+        slot = self._collapsed.get(item)
+        if slot is None:
+            slot = self._collapsed[item] = _CollapsedChildren(item)
+        slot.hidden = hidden
+        return list(shown) + [slot]
+
+    def _to_canvas(self, position):
+        """Convert a layout (x, depth) position into canvas coordinates before zoom."""
+        x, depth = position
+        return (x - self._min_x) * self.node_spacing + self.margin, depth * self.level_spacing + self.margin
+
+    def _draw_tree(self, root, positions):
+        """Draw the visible nodes of the tree, walking it with an explicit stack."""
+        stack = [(root, False, None)]
+        while stack:
+            node, is_best_path, parent_xy = stack.pop()
+            x, y = self._to_canvas(positions[node])
             
-        # Determine node color
-        if node.parent is None:  # Root node
-            color = self.node_colors["root"]
-        elif is_best_path:
-            color = self.node_colors["best_path"]
-        elif not node.children:  # Leaf node
-            color = self.node_colors["leaf"]
-        elif node.visits > 5:  # Frequently visited node
-            color = self.node_colors["expanded"]
-        else:
-            color = self.node_colors["default"]
-        
-        # Draw the node circle
-        node_id = self.canvas.create_oval(
-            x - self.node_size, y - self.node_size,
-            x + self.node_size, y + self.node_size,
-            fill=color, outline="black", width=2
-        )
-        
-        # Add text inside the node
+            # Skip subtrees lying entirely outside the visible area
+            if self._viewport is not None:
+                left, top, right, bottom = self._viewport
+                extent_left, extent_right = self.layout.extent(node)
+                if (y - self.node_size > bottom
+                        or x + extent_left * self.node_spacing > right
+                        or x + extent_right * self.node_spacing < left):
+                    continue
+                
+            # Determine node color
+            if node.parent is None:  # Root node
+                color = self.node_colors["root"]
+            elif is_best_path:
+                color = self.node_colors["best_path"]
+            elif not node.children:  # Leaf node
+                color = self.node_colors["leaf"]
+            elif node.visits > 5:  # Frequently visited node
+                color = self.node_colors["expanded"]
+            else:
+                color = self.node_colors["default"]
+            
+            if self._in_viewport(x, y):
+                self._render_node(node, x, y, color, parent_xy)
+            
+            # Find best child for highlighting the path
+            best_child = None
+            if node.children:
+                best_child = max(node.children, key=lambda c: c.visits)
+            
+            for child in self.layout.children[node]:
+                if isinstance(child, _CollapsedChildren):
+                    child_x, child_y = self._to_canvas(positions[child])
+                    self._render_glyph(node, child.hidden, child_x, child_y, (x, y))
+                else:
+                    stack.append((child, child is best_child, (x, y)))
+
+    def _render_node(self, node, x, y, color, parent_xy=None):
+        """Create the canvas items of a node, or update only what changed since the last frame."""
+        self._seen.add(node)
         visit_ratio = 0 if node.visits == 0 else node.value / node.visits
+        value_text = f"V: {visit_ratio:.2f}"
+        visits_text = f"N: {node.visits}"
+        position = (x, y, parent_xy)
         
-        self.canvas.create_text(
-            x, y - 8,
-            text=f"V: {visit_ratio:.2f}",
-            font=("Arial", 8),
-            fill="white"
-        )
+        items = self.items.get(node)
+        if items is None:
+            items = {
+                "oval": self.canvas.create_oval(
+                    *self._oval_coords(x, y), fill=color, outline="black", width=2
+                ),
+                "value": self.canvas.create_text(
+                    *self._scaled(x, y - 8), text=value_text, font=("Arial", 8), fill="white"
+                ),
+                "visits": self.canvas.create_text(
+                    *self._scaled(x, y + 8), text=visits_text, font=("Arial", 8), fill="white"
+                ),
+                "line": None,
+            }
+            if parent_xy is not None:
+                items["line"] = self._create_line(x, y, parent_xy)
+            self.canvas.tag_bind(items["oval"], "<Button-1>", lambda event, n=node: self.toggle_expand(n))
+            items.update(position=position, fill=color, value_text=value_text, visits_text=visits_text)
+            self.items[node] = items
+            return
         
-        self.canvas.create_text(
-            x, y + 8,
-            text=f"N: {node.visits}",
-            font=("Arial", 8),
-            fill="white"
+        # Move items only when the layout changed
+        if items["position"] != position:
+            self.canvas.coords(items["oval"], *self._oval_coords(x, y))
+            self.canvas.coords(items["value"], *self._scaled(x, y - 8))
+            self.canvas.coords(items["visits"], *self._scaled(x, y + 8))
+            if parent_xy is None:
+                if items["line"] is not None:
+                    self.canvas.delete(items["line"])
+                    items["line"] = None
+            elif items["line"] is None:
+                items["line"] = self._create_line(x, y, parent_xy)
+            else:
+                self.canvas.coords(items["line"], *self._line_coords(x, y, parent_xy))
+            items["position"] = position
+        
+        # Update fill and text only when the node statistics changed
+        if items["fill"] != color:
+            self.canvas.itemconfigure(items["oval"], fill=color)
+            items["fill"] = color
+        if items["value_text"] != value_text:
+            self.canvas.itemconfigure(items["value"], text=value_text)
+            items["value_text"] = value_text
+        if items["visits_text"] != visits_text:
+            self.canvas.itemconfigure(items["visits"], text=visits_text)
+            items["visits_text"] = visits_text
+
+    def _remove_node(self, node):
+        """Delete the canvas items of a node that left the tree."""
+        items = self.items.pop(node)
+        for key in ("oval", "value", "visits", "line"):
+            if items[key] is not None:
+                self.canvas.delete(items[key])
+
+    def _create_line(self, x, y, parent_xy, **options):
+        """Create the connection line to the parent, kept below the nodes."""
+        line_id = self.canvas.create_line(*self._line_coords(x, y, parent_xy), width=2, fill="black", **options)
+        self.canvas.tag_lower(line_id)
+        return line_id
+
+    def _scaled(self, *coords):
+        """Apply the current zoom level to layout coordinates."""
+        return [c * self.zoom for c in coords]
+
+    def _oval_coords(self, x, y):
+        return self._scaled(
+            x - self.node_size, y - self.node_size,
+            x + self.node_size, y + self.node_size
         )
+
+    def _line_coords(self, x, y, parent_xy):
+        parent_x, parent_y = parent_xy
+        return self._scaled(parent_x, parent_y + self.node_size, x, y - self.node_size)
+
+    def _render_glyph(self, node, hidden, x, y, parent_xy):
+        """Draw the aggregate glyph standing for the collapsed children of a node."""
+        text = f"+{len(hidden)}\nN: {sum(c.visits for c in hidden)}"
+        position = (x, y, parent_xy)
         
-        # Find best child for highlighting the path
-        best_child = None
-        if node.children:
-            best_child = max(node.children, key=lambda c: c.visits) if node.children else None
+        glyph = self.glyphs.get(node)
+        if glyph is not None and glyph["position"] != position:
+            self._remove_glyph(node)
+            glyph = None
+        if not self._in_viewport(x, y):
+            return
         
-        # Calculate positions for child nodes
-        if node.children:
-            num_children = len(node.children)
-            total_width = max(self.canvas_width, num_children * self.node_spacing)
-            
-            if num_children == 1:
-                # Single child - place directly below parent
-                child_x = x
-                child = node.children[0]
-                child_y = y + self.level_spacing
-                
-                # Draw connection line
-                self.canvas.create_line(
-                    x, y + self.node_size,
-                    child_x, child_y - self.node_size,
-                    width=2, fill="black"
-                )
-                
-                # Recursively draw the child
-                self._draw_node(
-                    child, child_x, child_y, depth + 1, 
-                    node_counts, is_best_path=(child == best_child)
-                )
-            else:
-                # Multiple children - distribute evenly
-                child_slots = num_children
-                width_per_child = total_width / (child_slots + 1)
-                
-                for i, child in enumerate(node.children):
-                    # Calculate child position
-                    child_x = (i + 1) * width_per_child
-                    child_y = y + self.level_spacing
-                    
-                    # Draw connection line
-                    self.canvas.create_line(
-                        x, y + self.node_size,
-                        child_x, child_y - self.node_size,
-                        width=2, fill="black"
-                    )
-                    
-                    # Recursively draw the child
-                    self._draw_node(
-                        child, child_x, child_y, depth + 1, 
-                        node_counts, is_best_path=(child == best_child)
-                    )
\ No newline at end of file
+        self._seen_glyphs.add(node)
+        if glyph is None:
+            half = self.node_size * 0.8
+            glyph = {
+                "box": self.canvas.create_rectangle(
+                    *self._scaled(x - half, y - half, x + half, y + half),
+                    fill="#CFD8DC", outline="black", width=1, dash=(3, 2)
+                ),
+                "label": self.canvas.create_text(
+                    *self._scaled(x, y), text=text, font=("Arial", 8), fill="black"
+                ),
+                "line": self._create_line(x, y, parent_xy, dash=(3, 2)),
+                "position": position,
+                "text": text,
+            }
+            for key in ("box", "label"):
+                self.canvas.tag_bind(glyph[key], "<Button-1>", lambda event, n=node: self.toggle_expand(n))
+            self.glyphs[node] = glyph
+        elif glyph["text"] != text:
+            self.canvas.itemconfigure(glyph["label"], text=text)
+            glyph["text"] = text
+
+    def _remove_glyph(self, node):
+        glyph = self.glyphs.pop(node)
+        for key in ("box", "label", "line"):
+            self.canvas.delete(glyph[key])